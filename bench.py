@@ -0,0 +1,275 @@
+import argparse, asyncio, json, statistics, subprocess, sys, tempfile, time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from steam import SteamClient
+from buff import BuffClient
+from metrics import Metrics, MemorySink, STAGE
+from ratelimit import RateLimiter
+from mock_server import MockSteamBuff, PASSWORD, SHARED_SECRET
+
+
+LIMITERS = ("proxy", "shared", "off")
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:                     # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _pct(vals: List[float], q: float) -> float:
+    s = sorted(vals)
+    return s[min(len(s) - 1, int(q * len(s)))] if s else 0.0
+
+
+async def run_bench(
+    accounts: int = 50,
+    concurrency: int = 20,
+    latency: float = 0.02,
+    jitter: float = 0.005,
+    pages: int = 3,
+    limiter: str = "proxy",
+) -> Dict:
+    # limiter: "proxy" — боевой RateLimiter, каждый аккаунт за своим прокси (как в AccountPool);
+    #          "shared" — боевой RateLimiter, все аккаунты с одного IP;
+    #          "off" — без лимитов, чистая скорость клиента
+    if limiter not in LIMITERS:
+        raise ValueError(f"Неизвестный режим лимитера: {limiter}")
+    server = MockSteamBuff(latency=latency, jitter=jitter)
+    await server.start()
+    connector = server.connector(limit=0)
+    sink = MemorySink(keep=("stage",))
+    metrics = Metrics(sink)
+    shared = RateLimiter()
+    if limiter == "off":
+        shared = RateLimiter(default_rate=1e9, account_rate=None,
+                             host_rates={h: 1e9 for h in ("steamcommunity.com", "store.steampowered.com", "buff.163.com")})
+    sem = asyncio.Semaphore(concurrency)
+    errors: List[str] = []
+    login_times: List[float] = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mafile = Path(tmp) / "bench.maFile"
+        mafile.write_text(json.dumps({"shared_secret": SHARED_SECRET, "account_name": "bench"}), "utf-8")
+
+        async def one(i: int) -> None:
+            async with sem:
+                steam = SteamClient(f"bench{i}", PASSWORD, mafile, connector=connector,
+                                    limiter=RateLimiter() if limiter == "proxy" else shared,
+                                    metrics=metrics)
+                try:
+                    t0 = time.perf_counter()
+                    await steam.login()
+                    buff = BuffClient(steam)
+                    await buff.login()
+                    login_times.append(time.perf_counter() - t0)
+                    for p in range(1, pages + 1):
+                        data = await buff.api_get("/api/market/goods", game="csgo", page_num=p, page_size=80)
+                        if data.get("code") != "OK":
+                            raise RuntimeError(data.get("code"))
+                except Exception as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+                finally:
+                    await steam.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(accounts)))
+        elapsed = time.perf_counter() - started
+
+    await connector.close()
+    await server.close()
+
+    stages = {}
+    for (name, labels), vals in sorted(sink.values.items()):
+        if name == STAGE:
+            stage = dict(labels)["stage"]
+            stages[stage] = {"count": len(vals), "p50": _pct(vals, 0.5), "p99": _pct(vals, 0.99)}
+    return {
+        "accounts": accounts,
+        "limiter": limiter,
+        "ok": len(login_times),
+        "errors": errors[:5],
+        "elapsed": elapsed,
+        "logins_per_sec": len(login_times) / elapsed if elapsed else 0.0,
+        "login_p50": _pct(login_times, 0.5),
+        "login_p99": _pct(login_times, 0.99),
+        "stages": stages,
+        "requests": sum(server.hits.values()),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def format_report(r: Dict) -> str:
+    lines = [
+        f"аккаунтов: {r['accounts']}, успешно: {r['ok']}, время: {r['elapsed']:.2f}s, "
+        f"запросов к mock: {r['requests']}, лимитер: {r['limiter']}",
+        f"логинов/с: {r['logins_per_sec']:.1f}   логин p50={r['login_p50'] * 1000:.1f}ms "
+        f"p99={r['login_p99'] * 1000:.1f}ms",
+        f"{'stage':<22}{'count':>7}{'p50 ms':>10}{'p99 ms':>10}",
+    ]
+    for name, s in r["stages"].items():
+        lines.append(f"{name:<22}{s['count']:>7}{s['p50'] * 1000:>10.1f}{s['p99'] * 1000:>10.1f}")
+    if r["peak_rss_mb"] is not None:
+        lines.append(f"peak RSS: {r['peak_rss_mb']:.1f} MB (вместе с mock-сервером)")
+    for e in r["errors"]:
+        lines.append(f"ошибка: {e}")
+    return "\n".join(lines)
+
+
+# ── потоковый разбор JSON ───────────────────────
+class _BytesReader:
+    # как aiohttp StreamReader: read(n) отдаёт куски по n байт
+    def __init__(self, raw: bytes):
+        self.raw, self.pos = raw, 0
+
+    async def read(self, n: int = -1) -> bytes:
+        end = len(self.raw) if n < 0 else self.pos + n
+        chunk, self.pos = self.raw[self.pos:end], min(end, len(self.raw))
+        return chunk
+
+
+def _goods_page(items: int) -> bytes:
+    goods = [
+        {
+            "id": i, "game": "csgo", "name": f"AK-47 | Redline (Field-Tested) #{i}",
+            "market_hash_name": f"AK-47 | Redline (Field-Tested) {i}",
+            "sell_min_price": f"{i * 0.37:.2f}", "sell_num": i % 500,
+            "buy_max_price": "1.50", "steam_price_cny": "12.30",
+        }
+        for i in range(items)
+    ]
+    return json.dumps({"code": "OK", "data": {"items": goods, "page_num": 1, "total_page": 1}, "msg": None}).encode()
+
+
+async def _stream_ms(raw: bytes, backend: str, runs: int) -> float:
+    from jsonstream import iter_items
+
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        async for _ in iter_items(_BytesReader(raw), backend=backend):
+            pass
+        times.append(time.perf_counter() - t0)
+    return min(times) * 1000
+
+
+def stream_bench(items: int = 40000, runs: int = 5) -> Dict:
+    # чем разбирать api_stream: "auto" должен выбирать самый быстрый из доступных
+    import jsonstream
+
+    raw = _goods_page(items)
+    times = {}
+    loads = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        json.loads(raw)
+        loads.append(time.perf_counter() - t0)
+    times["json.loads (целиком)"] = min(loads) * 1000
+    backends = ["scan"] + (["ijson"] if jsonstream.ijson is not None else [])
+    for b in backends:
+        times[b] = asyncio.run(_stream_ms(raw, b, runs))
+    auto = "ijson" if jsonstream.IJSON_FAST else "scan"
+    return {
+        "items": items, "mb": len(raw) / 1e6, "ms": times, "auto": auto,
+        "ijson_backend": getattr(jsonstream.ijson, "backend", None),
+        "ok": times[auto] <= min(times[b] for b in backends) * 1.2,   # 20% — шум замера
+    }
+
+
+def format_stream(r: Dict) -> str:
+    lines = [f"страница: {r['items']} товаров, {r['mb']:.1f} MB; ijson: {r['ijson_backend'] or 'нет'}"]
+    for name, ms in r["ms"].items():
+        lines.append(f"{name:<24}{ms:>8.1f}ms{'  ← auto' if name == r['auto'] else ''}")
+    lines.append("OK" if r["ok"] else "auto выбирает не самый быстрый разбор")
+    return "\n".join(lines)
+
+
+# ── время старта CLI ────────────────────────────
+HEAVY = ("aiohttp", "rsa", "steam", "buff", "aiohttp_socks")
+STARTUP_CMDS = {
+    "code": ["code", "--secret", SHARED_SECRET],
+    "help": ["--help"],
+}
+STARTUP_BUDGET_MS = 50.0    # сверх голого интерпретатора
+
+
+def _run_ms(cmd: List[str], runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, capture_output=True, check=True)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000
+
+
+def _heavy_imports(cmd: List[str]) -> List[str]:
+    # -X importtime пишет в stderr строку на каждый импортированный модуль
+    err = subprocess.run([sys.executable, "-X", "importtime", *cmd], capture_output=True, text=True).stderr
+    names = {line.rsplit("|", 1)[-1].strip().split(".")[0] for line in err.splitlines() if "|" in line}
+    return sorted(names.intersection(HEAVY))
+
+
+def startup_bench(runs: int = 10, budget_ms: float = STARTUP_BUDGET_MS) -> Dict:
+    cli = str(Path(__file__).with_name("cli.py"))
+    base = _run_ms([sys.executable, "-c", "pass"], runs)
+    commands = {}
+    for name, args in STARTUP_CMDS.items():
+        ms = _run_ms([sys.executable, cli, *args], runs)
+        commands[name] = {
+            "ms": ms,
+            "overhead_ms": ms - base,
+            "heavy": _heavy_imports([cli, *args]),
+        }
+    ok = all(c["overhead_ms"] <= budget_ms and not c["heavy"] for c in commands.values())
+    return {"baseline_ms": base, "budget_ms": budget_ms, "commands": commands, "ok": ok}
+
+
+def format_startup(r: Dict) -> str:
+    lines = [
+        f"голый python: {r['baseline_ms']:.1f}ms, бюджет CLI сверх него: {r['budget_ms']:.0f}ms",
+        f"{'команда':<10}{'ms':>8}{'сверх':>8}  тяжёлые импорты",
+    ]
+    for name, c in r["commands"].items():
+        lines.append(f"{name:<10}{c['ms']:>8.1f}{c['overhead_ms']:>8.1f}  {', '.join(c['heavy']) or '—'}")
+    lines.append("OK" if r["ok"] else "ПРЕВЫШЕНО")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Офлайн-бенчмарк логина и API на локальном mock Steam/Buff")
+    ap.add_argument("-n", "--accounts", type=int, default=50)
+    ap.add_argument("-c", "--concurrency", type=int, default=20)
+    ap.add_argument("--latency", type=float, default=0.02, help="задержка mock-сервера, секунд")
+    ap.add_argument("--jitter", type=float, default=0.005)
+    ap.add_argument("--pages", type=int, default=3, help="страниц /api/market/goods на аккаунт")
+    ap.add_argument("--limiter", choices=LIMITERS, default="proxy",
+                    help="proxy — боевые лимиты, у аккаунта свой IP; shared — один IP на всех; off — без лимитов")
+    ap.add_argument("--json", action="store_true", help="вывести результат в JSON")
+    ap.add_argument("--startup", action="store_true",
+                    help="замерить время старта cli.py; код возврата 1 при превышении бюджета")
+    ap.add_argument("--stream", action="store_true",
+                    help="сравнить разбор api_stream (scan/ijson) на странице --items товаров")
+    ap.add_argument("--items", type=int, default=40000)
+    ap.add_argument("--runs", type=int, default=10, help="запусков на команду для --startup")
+    ap.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    args = ap.parse_args(argv)
+    if args.stream:
+        r = stream_bench(args.items, min(args.runs, 5))
+        print(json.dumps(r, ensure_ascii=False, indent=2) if args.json else format_stream(r))
+        return 0 if r["ok"] else 1
+    if args.startup:
+        r = startup_bench(args.runs, args.budget_ms)
+        print(json.dumps(r, ensure_ascii=False, indent=2) if args.json else format_startup(r))
+        return 0 if r["ok"] else 1
+    r = asyncio.run(run_bench(args.accounts, args.concurrency, args.latency, args.jitter, args.pages,
+                              args.limiter))
+    print(json.dumps(r, ensure_ascii=False, indent=2) if args.json else format_report(r))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
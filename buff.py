@@ -1,22 +1,47 @@
-import aiohttp
+import aiohttp, asyncio
 from typing import Dict, Any
-import re
+import ratelimit
+from jsonstream import StreamError, dumps, iter_items, loads
+from openid_form import extract_form, steam_id
+from session_store import is_logged_in
 from urllib.parse import urlparse, parse_qs, unquote
 
 BUFF = "https://buff.163.com"
+BUFF_HOST = "buff.163.com"
 FORM_URL = BUFF + "/account/login/steam?back_url=/"
 STEAM_POST = "https://steamcommunity.com/openid/login"
 HEAD_API = {"X-Requested-With": "XMLHttpRequest"}
 
 
 class BuffClient:
-    def __init__(self, steam, *, debug=False):
+    def __init__(self, steam, *, retries=3, cache=None, debug=False):
         self.steam = steam
-        self.sess = steam.sess
-        self.proxy, self.proxy_auth = steam.proxy, steam.proxy_auth
+        self.cache = cache              # cache.ResponseCache: склейка одинаковых GET и короткий кэш
+        self.limiter = steam.limiter
+        self.metrics = steam.metrics
+        self.account = steam.username
+        self.retries = retries
         self.debug = debug
+        self._failing_over = False
+
+    # сессия и прокси берутся у SteamClient: после failover они меняются
+    @property
+    def sess(self):
+        return self.steam.sess
+
+    @property
+    def proxy(self):
+        return self.steam.proxy
+
+    @property
+    def proxy_auth(self):
+        return self.steam.proxy_auth
 
     async def login(self) -> Dict[str, str]:
+        with self.metrics.span("buff.login"):
+            return await self._login()
+
+    async def _login(self) -> Dict[str, str]:
         if self.debug:
             print("\n[BUFF] Начинаем авторизацию")
 
@@ -25,6 +50,7 @@ class BuffClient:
                 FORM_URL,
                 proxy=self.proxy,
                 proxy_auth=self.proxy_auth,
+                trace_request_ctx={"stage": "buff.redirect"},
                 allow_redirects=False
         ) as resp:
             if self.debug:
@@ -73,6 +99,7 @@ class BuffClient:
                 data=openid_params,
                 proxy=self.proxy,
                 proxy_auth=self.proxy_auth,
+                trace_request_ctx={"stage": "buff.openid_post"},
                 allow_redirects=False,
                 headers={
                     'Content-Type': 'application/x-www-form-urlencoded',
@@ -93,6 +120,7 @@ class BuffClient:
                             location,
                             proxy=self.proxy,
                             proxy_auth=self.proxy_auth,
+                            trace_request_ctx={"stage": "buff.callback"},
                             allow_redirects=True
                     ) as buff_resp:
                         if self.debug:
@@ -116,42 +144,27 @@ class BuffClient:
                         async with self.sess.get(
                                 location if location.startswith('http') else f"https://steamcommunity.com{location}",
                                 proxy=self.proxy,
-                                proxy_auth=self.proxy_auth
+                                proxy_auth=self.proxy_auth,
+                                trace_request_ctx={"stage": "buff.openid_form"}
                         ) as form_resp:
                             if form_resp.status == 200:
                                 html = await form_resp.text()
 
+                                form = extract_form(html)
+
                                 if self.debug:
                                     print(f"[BUFF] Получена страница длиной {len(html)} символов")
-                                    print("[BUFF] HTML preview:")
-                                    print(html[:500])
-                                    print("...")
-
-                                    if 'g_steamID' in html:
-                                        match = re.search(r'g_steamID = "(\d+)"', html)
-                                        if match:
-                                            print(f"[BUFF] Обнаружен Steam ID: {match.group(1)}")
-
-                                    if 'submit()' in html:
-                                        print("[BUFF] Обнаружена автоматическая отправка формы")
-
-                                hidden_inputs = re.findall(
-                                    r'<input[^>]*type=["\']hidden["\'][^>]*name=["\']([^"\']+)["\'][^>]*value=["\']([^"\']*)["\']',
-                                    html,
-                                    re.IGNORECASE
-                                )
-
-                                if hidden_inputs:
-                                    form_data = dict(hidden_inputs)
+                                    sid = steam_id(html)
+                                    if sid:
+                                        print(f"[BUFF] Обнаружен Steam ID: {sid}")
+
+                                if form and form.fields:
+                                    form_data = form.fields
                                     if self.debug:
-                                        print(f"[BUFF] Найдено {len(form_data)} hidden полей")
+                                        print(f"[BUFF] Найдено {len(form_data)} полей формы")
 
-                                    action_match = re.search(r'<form[^>]*action=["\']([^"\']+)["\']', html,
-                                                             re.IGNORECASE)
-                                    if action_match:
-                                        action = action_match.group(1)
-                                        if not action.startswith('http'):
-                                            action = f"https://steamcommunity.com{action}"
+                                    if form.action:
+                                        action = form.url()
 
                                         if self.debug:
                                             print(f"[BUFF] Отправляем форму на: {action}")
@@ -161,6 +174,7 @@ class BuffClient:
                                                 data=form_data,
                                                 proxy=self.proxy,
                                                 proxy_auth=self.proxy_auth,
+                                                trace_request_ctx={"stage": "buff.form_resubmit"},
                                                 allow_redirects=False
                                         ) as submit_resp:
                                             if submit_resp.status in (302, 303):
@@ -171,6 +185,7 @@ class BuffClient:
                                                             final_location,
                                                             proxy=self.proxy,
                                                             proxy_auth=self.proxy_auth,
+                                                            trace_request_ctx={"stage": "buff.callback"},
                                                             allow_redirects=True
                                                     ) as final_resp:
                                                         if self.debug:
@@ -184,15 +199,14 @@ class BuffClient:
                 html = await resp.text()
                 if self.debug:
                     print(f"[BUFF] Steam вернул HTML ({len(html)} символов)")
-                    print("[BUFF] Начало ответа:")
-                    print(html[:300])
 
         cookies = self._get_cookies()
         if not cookies:
             async with self.sess.get(
                     BUFF,
                     proxy=self.proxy,
-                    proxy_auth=self.proxy_auth
+                    proxy_auth=self.proxy_auth,
+                    trace_request_ctx={"stage": "buff.home"}
             ) as resp:
                 if self.debug:
                     print(f"[BUFF] Загрузка главной → {resp.status}")
@@ -205,36 +219,25 @@ class BuffClient:
         return cookies
 
     def _get_cookies(self) -> Dict[str, str]:
-        cookies = {}
-        for cookie in self.sess.cookie_jar:
-            domain = str(cookie.get('domain', ''))
-            if any(d in domain.lower() for d in ['buff', '163.com', '.163']):
-                cookies[cookie.key] = cookie.value
-                if self.debug:
-                    print(f"[BUFF] Cookie найден: {cookie.key} ({domain})")
-
+        # из индекса jar (cookies.IndexedCookieJar): buff.163.com и родительские домены
+        cookies = self.sess.cookie_jar.for_host(BUFF_HOST)
+        if self.debug and cookies:
+            print(f"[BUFF] Cookies: {', '.join(cookies)}")
         return cookies
 
     async def _handle_steam_form(self, html: str, current_url: str) -> Dict[str, str]:
         if self.debug:
             print("[BUFF] Обработка формы Steam OpenID")
 
-        form_match = re.search(r'<form[^>]*action=["\']([^"\']+)["\'][^>]*>(.*?)</form>', html,
-                               re.IGNORECASE | re.DOTALL)
-        if not form_match:
+        form = extract_form(html)
+        if not form:
             if self.debug:
                 print("[BUFF] Форма не найдена, проверяем авторизацию...")
                 # Возможно мы уже авторизованы
-                if 'g_steamID' in html and 'g_steamID = "76561199548150646"' in html:
+                if steam_id(html):
                     print("[BUFF] Steam ID найден, пробуем автоматическую отправку")
 
-        inputs = re.findall(r'<input[^>]*name=["\']([^"\']+)["\'][^>]*value=["\']([^"\']*)["\']', html, re.IGNORECASE)
-        form_data = dict(inputs)
-
-        inputs2 = re.findall(r'<input[^>]*value=["\']([^"\']*)["\'][^>]*name=["\']([^"\']+)["\']', html, re.IGNORECASE)
-        for value, name in inputs2:
-            if name not in form_data:
-                form_data[name] = value
+        form_data = form.fields if form else {}
 
         if form_data and 'openid.mode' in form_data:
             if self.debug:
@@ -245,6 +248,7 @@ class BuffClient:
                     data=form_data,
                     proxy=self.proxy,
                     proxy_auth=self.proxy_auth,
+                    trace_request_ctx={"stage": "buff.form_resubmit"},
                     allow_redirects=False
             ) as resp:
                 if self.debug:
@@ -257,6 +261,7 @@ class BuffClient:
                                 location,
                                 proxy=self.proxy,
                                 proxy_auth=self.proxy_auth,
+                                trace_request_ctx={"stage": "buff.callback"},
                                 allow_redirects=True
                         ) as final_resp:
                             if self.debug:
@@ -270,17 +275,138 @@ class BuffClient:
         raise RuntimeError("Не удалось завершить OpenID авторизацию")
 
     async def api_get(self, path: str, **params):
+        if self.cache is None:
+            return (await self._api_get(path, **params))[0]
+        return await self.cache.fetch(path, params, self.account, lambda: self._api_get(path, **params))
+
+    async def _api_get(self, path: str, **params):
         url = BUFF + path
+        host = urlparse(url).hostname
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                async with self.sess.get(
+                        url,
+                        params=params,
+                        proxy=self.proxy,
+                        proxy_auth=self.proxy_auth,
+                        trace_request_ctx={"stage": "buff.api"},
+                        headers=HEAD_API,
+                ) as r:
+                    if self.debug:
+                        print(f"[BUFF API] GET {path} → {r.status}")
+                    if r.status in ratelimit.THROTTLE_STATUS and not last:
+                        await asyncio.sleep(ratelimit.retry_after(r) or ratelimit.backoff(attempt))
+                        continue
+                    raw = await r.read()
+                    data = loads(raw) if raw.strip() else None
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if last:
+                    raise
+                await self._maybe_failover()
+                await asyncio.sleep(ratelimit.backoff(attempt))
+                continue
+
+            if self.debug and r.status != 200:
+                print(f"[BUFF API] Response: {data}")
+            if isinstance(data, dict) and data.get("code") in ratelimit.BUFF_THROTTLE_CODES:
+                self.limiter.feedback(host, self.account, throttled=True, egress=self.steam.proxy_url)
+                if not last:
+                    await asyncio.sleep(ratelimit.backoff(attempt))
+                    continue
+            return data, len(raw)
+
+    async def api_poll(self, path: str, *, timeout: float, **params):
+        # один long-poll запрос: без кэша и повторов, сервер держит его до timeout;
+        # переподключение и backoff — на вызывающем (notifications.NotificationHub)
+        async with self.sess.get(
+                BUFF + path,
+                params={**params, "timeout": str(int(timeout))},
+                proxy=self.proxy,
+                proxy_auth=self.proxy_auth,
+                timeout=aiohttp.ClientTimeout(total=timeout + 15),
+                trace_request_ctx={"stage": "buff.poll"},
+                headers=HEAD_API,
+        ) as r:
+            if r.status in ratelimit.THROTTLE_STATUS:
+                raise aiohttp.ClientResponseError(
+                    r.request_info, r.history, status=r.status, message="throttled", headers=r.headers,
+                )
+            raw = await r.read()
+        return loads(raw) if raw.strip() else None
+
+    def csrf_token(self) -> str:
+        token = self.sess.cookie_jar.get("csrf_token", BUFF_HOST)
+        if not token:
+            raise RuntimeError("Нет csrf_token в cookies Buff — сначала login()")
+        return token
+
+    def post_headers(self, csrf: str | None = None) -> Dict[str, str]:
+        return {
+            **HEAD_API,
+            "Content-Type": "application/json",
+            "X-CSRFToken": csrf or self.csrf_token(),
+            "Referer": BUFF + "/",
+        }
+
+    async def api_post(self, path: str, payload: Any = None, *, body: bytes | None = None,
+                       headers: Dict[str, str] | None = None):
+        # POST не повторяем: покупка/выставление не идемпотентны.
+        # body и headers можно подготовить заранее (см. executor.BatchExecutor)
+        async with self.sess.post(
+                BUFF + path,
+                data=body if body is not None else dumps(payload),
+                proxy=self.proxy,
+                proxy_auth=self.proxy_auth,
+                trace_request_ctx={"stage": "buff.api_post"},
+                headers=headers or self.post_headers(),
+        ) as r:
+            if self.debug:
+                print(f"[BUFF API] POST {path} → {r.status}")
+            raw = await r.read()
+        return loads(raw) if raw.strip() else None
+
+    async def _maybe_failover(self) -> None:
+        # уходим с прокси, только когда ProxyManager отправил его в карантин
+        mgr = self.steam.proxies
+        if not mgr or self._failing_over:
+            return
+        h = mgr.health.get(self.steam.proxy_url)
+        if h is None or not h.quarantined:
+            return
+        new = mgr.best(exclude=[self.steam.proxy_url])
+        if not new:
+            return
+        self._failing_over = True
+        try:
+            await self.steam.switch_proxy(new)
+            # cookies переехали вместе с jar; логинимся заново, только если Buff их не принял
+            if not await is_logged_in(self):
+                if self.debug:
+                    print("[BUFF] Сессия не пережила смену прокси, логинимся заново")
+                await self.steam.login()
+                await self.login()
+        finally:
+            self._failing_over = False
+
+    async def api_stream(self, path: str, *, fields=None, backend="auto", **params):
+        # data.items по одному элементу, без сборки всего ответа в память;
+        # fields — какие ключи оставить у каждого элемента
         async with self.sess.get(
-                url,
+                BUFF + path,
                 params=params,
                 proxy=self.proxy,
                 proxy_auth=self.proxy_auth,
+                trace_request_ctx={"stage": "buff.api_stream"},
                 headers=HEAD_API,
         ) as r:
             if self.debug:
-                print(f"[BUFF API] GET {path} → {r.status}")
-            data = await r.json(content_type=None)
-            if self.debug and r.status != 200:
-                print(f"[BUFF API] Response: {data}")
-            return data
\ No newline at end of file
+                print(f"[BUFF API] STREAM {path} → {r.status}")
+            try:
+                async for item in iter_items(r.content, fields=fields, backend=backend):
+                    yield item
+            except StreamError as e:
+                if e.code in ratelimit.BUFF_THROTTLE_CODES:
+                    self.limiter.feedback(urlparse(BUFF).hostname, self.account, throttled=True,
+                                          egress=self.steam.proxy_url)
+                raise
@@ -0,0 +1,126 @@
+import asyncio, time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# TTL по префиксу пути, секунд; 0 — не кэшировать, но всё равно склеивать одинаковые запросы
+TTLS = {
+    "/api/market/goods/sell_order": 0.3,
+    "/api/market/goods/buy_order": 0.3,
+    "/api/market/goods": 0.5,
+    "/account/api/user/info": 5.0,
+}
+# общие для всех аккаунтов ответы; остальные кэшируются отдельно на аккаунт
+SHARED = ("/api/market/goods",)
+MAX_BYTES = 32 * 1024 * 1024
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...], str]
+
+
+class ResponseCache:
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, *, max_bytes: int = MAX_BYTES):
+        # длинные префиксы проверяем первыми
+        self.ttls = sorted({**TTLS, **(ttls or {})}.items(), key=lambda kv: -len(kv[0]))
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._lru: "OrderedDict[Key, Tuple[float, int, Any]]" = OrderedDict()
+        self._inflight: Dict[Key, Tuple[asyncio.Task, str]] = {}    # → загрузка и чей это запрос
+        self.hits = self.misses = self.coalesced = self.retried = self.evictions = 0
+
+    def ttl_for(self, path: str) -> float:
+        for prefix, ttl in self.ttls:
+            if path.startswith(prefix):
+                return ttl
+        return 0.0
+
+    @staticmethod
+    def key(path: str, params: Dict, account: str) -> Key:
+        owner = "" if path.startswith(SHARED) else account
+        return path, tuple(sorted((k, str(v)) for k, v in params.items())), owner
+
+    def _store(self, key: Key, ttl: float, size: int, data: Any) -> None:
+        if size > self.max_bytes:
+            return
+        old = self._lru.pop(key, None)
+        if old:
+            self.size -= old[1]
+        self._lru[key] = (time.monotonic() + ttl, size, data)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, s, _) = self._lru.popitem(last=False)
+            self.size -= s
+            self.evictions += 1
+
+    def _lookup(self, key: Key) -> Optional[Any]:
+        entry = self._lru.get(key)
+        if entry is None:
+            return None
+        expires, size, data = entry
+        if time.monotonic() >= expires:
+            del self._lru[key]
+            self.size -= size
+            return None
+        self._lru.move_to_end(key)
+        return data
+
+    async def fetch(
+        self,
+        path: str,
+        params: Dict,
+        account: str,
+        load: Callable[[], Awaitable[Tuple[Any, int]]],
+    ) -> Any:
+        # load() -> (data, размер тела в байтах). Возвращаемый dict общий — не изменяйте его
+        key = self.key(path, params, account)
+        data = self._lookup(key)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        entry = self._inflight.get(key)
+        if entry is None:
+            self.misses += 1
+            # загрузка принадлежит кэшу, а не первому вызывающему: его отмена
+            # (wait_for, остановленный обход) не должна отменять остальных
+            task = asyncio.create_task(self._load(key, path, load))
+            self._inflight[key] = (task, account)
+            task.add_done_callback(lambda t: self._done(key, t))
+            return await asyncio.shield(task)
+
+        task, starter = entry
+        self.coalesced += 1
+        if starter == account:
+            return await asyncio.shield(task)
+        # ответ чужой сессии годится только с "OK": Login Required, троттлинг
+        # и сетевые ошибки — про тот аккаунт, повторяем своей сессией
+        try:
+            data = await asyncio.shield(task)
+        except Exception:
+            data = None
+        if isinstance(data, dict) and data.get("code") == "OK":
+            return data
+        self.retried += 1
+        return await self._load(key, path, load)
+
+    async def _load(self, key: Key, path: str, load: Callable[[], Awaitable[Tuple[Any, int]]]) -> Any:
+        data, size = await load()
+        ttl = self.ttl_for(path)
+        if ttl > 0 and isinstance(data, dict) and data.get("code") == "OK":
+            self._store(key, ttl, size, data)
+        return data
+
+    def _done(self, key: Key, task: asyncio.Task) -> None:
+        if self._inflight.get(key, (None,))[0] is task:
+            del self._inflight[key]
+        # ошибку прочитают ожидающие; если их нет — не ругаться в лог
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "retried": self.retried,
+            "evictions": self.evictions, "entries": len(self._lru), "bytes": self.size,
+        }
+
+    def clear(self) -> None:
+        self._lru.clear()
+        self.size = 0
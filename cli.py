@@ -0,0 +1,197 @@
+import argparse, sys
+
+# Тяжёлые модули (aiohttp, rsa, steam, buff) импортируются внутри команд:
+# `cli.py code` не должен платить за них при старте. Проверка — `cli.py bench --startup`.
+
+
+def _settings():
+    import launcher
+    return launcher
+
+
+def _mafile_secret(args) -> str:
+    if args.secret:
+        return args.secret
+    import json
+    from pathlib import Path
+    return json.loads(Path(args.mafile).read_text("utf-8"))["shared_secret"]
+
+
+def _proxy(args):
+    if args.proxy:
+        return args.proxy
+    if args.port is not None:
+        return _settings().proxy_for(args.port)
+    return None
+
+
+def _ports(spec: str):
+    # "10000-10009" или "10000,10003,10007"
+    ports = []
+    for part in spec.split(","):
+        a, _, b = part.partition("-")
+        ports.extend(range(int(a), int(b or a) + 1))
+    return ports
+
+
+# ── команды ─────────────────────────────────────
+def cmd_code(args) -> int:
+    from guard import SteamGuard
+
+    totp = SteamGuard.for_secret(_mafile_secret(args))
+    if args.window:
+        print(" ".join(totp.window()))
+    else:
+        print(totp.code())
+    return 0
+
+
+def cmd_probe(args) -> int:
+    import asyncio
+    from prober import probe_ports, format_table
+    from session_store import SessionStore
+
+    cfg = _settings()
+    results = asyncio.run(probe_ports(
+        _ports(args.ports) if args.ports else cfg.PORTS, cfg.proxy_for,
+        args.login, args.password, args.mafile,
+        concurrency=args.concurrency,
+        winners=args.winners or None,
+        store=None if args.no_cache else SessionStore(cfg.SESSION_DIR, ttl=cfg.SESSION_TTL),
+        debug=args.debug,
+    ))
+    print(format_table(results))
+    return 0 if any(r.ok for r in results) else 1
+
+
+async def _client(args):
+    from steam import SteamClient
+    from buff import BuffClient
+    from session_store import SessionStore, login_cached
+
+    cfg = _settings()
+    steam = SteamClient(args.login, args.password, args.mafile, proxy=_proxy(args), debug=args.debug)
+    buff = BuffClient(steam, debug=args.debug)
+    store = None if args.no_cache else SessionStore(cfg.SESSION_DIR, ttl=cfg.SESSION_TTL)
+    try:
+        cookies = await login_cached(steam, buff, store)
+    except BaseException:
+        await steam.close()
+        raise
+    return steam, buff, cookies
+
+
+def cmd_login(args) -> int:
+    import asyncio
+
+    async def run() -> int:
+        steam, buff, cookies = await _client(args)
+        try:
+            print(f"Steam + BUFF авторизация успешна (cookies: {sorted(cookies)})")
+        finally:
+            await steam.close()
+        return 0
+
+    return asyncio.run(run())
+
+
+def cmd_crawl(args) -> int:
+    import asyncio
+    from crawler import MarketCrawler
+    from jsonstream import dumps
+
+    async def run() -> int:
+        steam, buff, _ = await _client(args)
+        out = open(args.out, "ab") if args.out else sys.stdout.buffer
+        n = 0
+        try:
+            crawler = MarketCrawler(
+                buff, game=args.game, concurrency=args.concurrency, rate=args.rate,
+                state_file=args.state, debug=args.debug,
+            )
+            async for item in crawler.crawl():
+                out.write(dumps(item) + b"\n")
+                n += 1
+        finally:
+            if args.out:
+                out.close()
+            else:
+                out.flush()
+            await steam.close()
+        print(f"[CRAWL] предметов: {n}, страниц: {crawler.total_page}, пропущено: {crawler.failed}",
+              file=sys.stderr)
+        return 0 if not crawler.failed else 1
+
+    return asyncio.run(run())
+
+
+def cmd_bench(args) -> int:
+    import bench
+    return bench.main(args.rest)
+
+
+# ── разбор аргументов ───────────────────────────
+def build_parser() -> argparse.ArgumentParser:
+    cfg = _settings()
+    ap = argparse.ArgumentParser(prog="cli.py", description="Steam/Buff: проверка портов, вход, коды, обход рынка")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def account(p, proxy: bool = True) -> None:
+        p.add_argument("--login", default=cfg.LOGIN)
+        p.add_argument("--password", default=cfg.PWD)
+        p.add_argument("--mafile", default=cfg.MAFILE)
+        p.add_argument("--no-cache", action="store_true", help="не использовать сохранённую сессию")
+        p.add_argument("--debug", action="store_true")
+        if proxy:
+            g = p.add_mutually_exclusive_group()
+            g.add_argument("--proxy", help="http://user:pass@ip:port или socks5://...")
+            g.add_argument("--port", type=int, help="порт прокси из настроек launcher.py")
+
+    p = sub.add_parser("code", help="код Steam Guard")
+    p.add_argument("--mafile", default=cfg.MAFILE)
+    p.add_argument("--secret", help="shared_secret вместо maFile")
+    p.add_argument("--window", action="store_true", help="предыдущий, текущий и следующий коды")
+    p.set_defaults(func=cmd_code)
+
+    p = sub.add_parser("probe", help="найти рабочие порты прокси")
+    account(p, proxy=False)
+    p.add_argument("--ports", help="10000-10009 или 10000,10003")
+    p.add_argument("-c", "--concurrency", type=int, default=cfg.CONCURRENCY)
+    p.add_argument("--winners", type=int, default=cfg.WINNERS or 0, help="0 — проверить все")
+    p.set_defaults(func=cmd_probe)
+
+    p = sub.add_parser("login", help="войти в Steam и Buff, сохранить сессию")
+    account(p)
+    p.set_defaults(func=cmd_login)
+
+    p = sub.add_parser("crawl", help="выгрузить рынок Buff в JSONL")
+    account(p)
+    p.add_argument("--game", default="csgo")
+    p.add_argument("-c", "--concurrency", type=int, default=8)
+    p.add_argument("--rate", type=float, default=5.0, help="запросов в секунду")
+    p.add_argument("--state", help="файл прогресса для продолжения обхода")
+    p.add_argument("-o", "--out", help="куда писать (по умолчанию stdout)")
+    p.set_defaults(func=cmd_crawl)
+
+    # остальные аргументы уходят в bench.main как есть
+    p = sub.add_parser("bench", help="офлайн-бенчмарк на mock-сервере (аргументы bench.py)",
+                       add_help=False)
+    p.set_defaults(func=cmd_bench)
+    return ap
+
+
+def main(argv=None) -> int:
+    ap = build_parser()
+    args, rest = ap.parse_known_args(argv)
+    if args.cmd == "bench":
+        args.rest = rest
+    elif rest:
+        ap.error(f"лишние аргументы: {' '.join(rest)}")
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
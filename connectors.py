@@ -0,0 +1,75 @@
+import asyncio
+from typing import Dict, Iterable, Optional
+
+import aiohttp
+
+# ── настройки пула соединений ───────────────────
+LIMIT = 100             # всего соединений на коннектор
+LIMIT_PER_HOST = 20     # соединений на один хост
+KEEPALIVE = 60.0        # сколько держать простаивающее соединение
+DNS_TTL = 600           # кэш DNS, секунд
+
+WARM_HOSTS = (
+    "https://steamcommunity.com/",
+    "https://store.steampowered.com/",      # getrsakey/dologin идут и сюда
+    "https://api.steampowered.com/",        # синхронизация часов для 2FA
+    "https://buff.163.com/",
+)
+
+_shared: Dict[str, aiohttp.BaseConnector] = {}
+
+
+def make_connector(
+    proxy: Optional[str] = None,
+    *,
+    limit: int = LIMIT,
+    limit_per_host: int = LIMIT_PER_HOST,
+    keepalive_timeout: float = KEEPALIVE,
+    ttl_dns_cache: int = DNS_TTL,
+) -> aiohttp.BaseConnector:
+    kw = dict(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=ttl_dns_cache,
+    )
+    if proxy and proxy.startswith("socks"):
+        from aiohttp_socks import ProxyConnector
+
+        return ProxyConnector.from_url(proxy, **kw)
+    # http-прокси передаётся в каждом запросе, коннектор обычный
+    return aiohttp.TCPConnector(**kw)
+
+
+def shared_connector(proxy: Optional[str] = None, **kw) -> aiohttp.BaseConnector:
+    # один коннектор на прокси: клиенты с одним прокси делят TCP/TLS и DNS-кэш
+    key = proxy or ""
+    conn = _shared.get(key)
+    if conn is None or conn.closed:
+        conn = _shared[key] = make_connector(proxy, **kw)
+    return conn
+
+
+async def close_shared() -> None:
+    conns = list(_shared.values())
+    _shared.clear()
+    await asyncio.gather(*(c.close() for c in conns if not c.closed), return_exceptions=True)
+
+
+async def prewarm(sess: aiohttp.ClientSession, proxy=None, proxy_auth=None,
+                  urls: Iterable[str] = WARM_HOSTS, *, timeout: float = 10.0) -> None:
+    # открываем TLS заранее, чтобы логин не ждал рукопожатий
+    async def hit(url: str):
+        try:
+            async with sess.head(
+                url,
+                proxy=proxy,
+                proxy_auth=proxy_auth,
+                allow_redirects=False,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as r:
+                await r.release()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+
+    await asyncio.gather(*(hit(u) for u in urls))
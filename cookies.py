@@ -0,0 +1,154 @@
+import ipaddress, time
+from email.utils import parsedate_to_datetime
+from http.cookies import CookieError, Morsel, SimpleCookie
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import aiohttp
+from yarl import URL
+
+# значение и срок жизни (unix-время, None — до конца сессии)
+Entry = Tuple[str, Optional[float]]
+
+
+def _suffixes(host: str) -> Iterator[str]:
+    # buff.163.com → buff.163.com, 163.com, com
+    host = host.lower().rstrip(".")
+    while host:
+        yield host
+        host = host.partition(".")[2]
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def _expires(m: Morsel) -> Optional[float]:
+    if m["max-age"]:
+        try:
+            return time.time() + int(m["max-age"])
+        except ValueError:
+            pass
+    if m["expires"]:
+        try:
+            return parsedate_to_datetime(m["expires"]).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+class IndexedCookieJar(aiohttp.CookieJar):
+    # Обычный CookieJar плюс индекс domain → name → значение. Индекс обновляется
+    # при каждом Set-Cookie, поэтому session/csrf_token читаются без обхода jar.
+    # path не учитывается: индекс нужен для чтения токенов, а не для отправки cookies.
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self._unsafe_hosts = kw.get("unsafe", False)
+        self._index: Dict[str, Dict[str, Entry]] = {}
+
+    def update_cookies(self, cookies, response_url: URL = URL()) -> None:
+        super().update_cookies(cookies, response_url)
+        self._index_update(cookies, response_url)
+
+    def update_cookies_from_headers(self, headers, response_url: URL) -> None:
+        # aiohttp >= 3.12 кладёт Set-Cookie ответа сюда, минуя update_cookies
+        super().update_cookies_from_headers(headers, response_url)
+        for header in headers:
+            sc = SimpleCookie()
+            try:
+                sc.load(header)
+            except CookieError:
+                continue
+            self._index_update(sc, response_url)
+
+    def _index_update(self, cookies, response_url: URL) -> None:
+        host = (response_url.raw_host or "").lower()
+        if host and not self._unsafe_hosts and _is_ip(host):
+            return                              # aiohttp такие cookies не принимает
+        items = cookies.items() if hasattr(cookies, "items") else cookies
+        for name, m in items:
+            if not isinstance(m, Morsel):
+                tmp = SimpleCookie()
+                tmp[name] = m
+                m = tmp[name]
+            domain = (m["domain"] or "").lstrip(".").lower() or host
+            if not domain or (host and domain not in _suffixes(host)):
+                continue
+            expires = _expires(m)
+            if expires is not None and expires <= time.time():
+                self._index.get(domain, {}).pop(name, None)
+            else:
+                self._index.setdefault(domain, {})[name] = (m.value, expires)
+
+    def _reindex(self) -> None:
+        self._index = {}
+        for m in self:
+            self._index.setdefault(m["domain"].lstrip(".").lower(), {})[m.key] = (m.value, _expires(m))
+
+    def clear(self, predicate=None) -> None:
+        super().clear(predicate)
+        self._reindex()
+
+    def clear_domain(self, domain: str) -> None:
+        super().clear_domain(domain)
+        self._reindex()
+
+    # ── чтение ──────────────────────────────────────
+    def get(self, name: str, host: str, default: Optional[str] = None) -> Optional[str]:
+        # самый точный домен выигрывает: buff.163.com раньше 163.com
+        now = time.time()
+        for domain in _suffixes(host):
+            entry = self._index.get(domain, {}).get(name)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                return entry[0]
+        return default
+
+    def for_host(self, host: str) -> Dict[str, str]:
+        now = time.time()
+        out: Dict[str, str] = {}
+        for domain in reversed(list(_suffixes(host))):
+            for name, (value, expires) in self._index.get(domain, {}).items():
+                if expires is None or expires > now:
+                    out[name] = value
+        return out
+
+    # ── снимок ──────────────────────────────────────
+    def export(self) -> List[Dict]:
+        return dump(self)
+
+    def restore(self, rows: List[Dict]) -> None:
+        load(self, rows)
+
+
+def dump(jar) -> List[Dict]:
+    return [
+        {
+            "key": c.key,
+            "value": c.value,
+            "domain": c["domain"],
+            "path": c["path"] or "/",
+            "expires": c["expires"],
+            "max-age": c["max-age"],
+            "secure": bool(c["secure"]),
+            "httponly": bool(c["httponly"]),
+        }
+        for c in jar
+    ]
+
+
+def load(jar, rows: List[Dict]) -> None:
+    for item in rows:
+        sc = SimpleCookie()
+        sc[item["key"]] = item["value"]
+        m = sc[item["key"]]
+        for attr in ("domain", "path", "expires", "max-age"):
+            if item.get(attr):
+                m[attr] = item[attr]
+        m["secure"] = item.get("secure", False)
+        m["httponly"] = item.get("httponly", False)
+        host = item["domain"].lstrip(".") or "steamcommunity.com"
+        jar.update_cookies(sc, URL(f"https://{host}/"))
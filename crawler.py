@@ -0,0 +1,166 @@
+import asyncio, json, time
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+GOODS_PATH = "/api/market/goods"
+
+
+class PageError(RuntimeError):
+    pass
+
+
+class MarketCrawler:
+    # client — всё, у чего есть api_get: BuffClient или AccountPool
+    def __init__(
+        self,
+        client,
+        *,
+        game: str = "csgo",
+        concurrency: int = 8,
+        rate: float = 5.0,              # запросов в секунду
+        page_size: int = 80,
+        min_page_size: int = 10,
+        retries: int = 3,
+        state_file: str | Path | None = None,
+        queue_size: int = 1000,
+        params: Optional[Dict[str, str]] = None,
+        debug: bool = False,
+    ):
+        self.client = client
+        self.game = game
+        self.concurrency = concurrency
+        self.rate = rate
+        self.page_size = page_size
+        self.min_page_size = min_page_size
+        self.retries = retries
+        self.state_file = Path(state_file) if state_file else None
+        self.queue_size = queue_size
+        self.params = params or {}
+        self.debug = debug
+
+        self.total_page = 0
+        self.failed: List[int] = []
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    # ── лимит скорости ──────────────────────────────
+    async def _throttle(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + 1.0 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    # ── состояние для продолжения ───────────────────
+    def _load_state(self) -> int:
+        if not self.state_file:
+            return 0
+        try:
+            state = json.loads(self.state_file.read_text("utf-8"))
+        except (OSError, ValueError):
+            return 0
+        self.page_size = state.get("page_size", self.page_size)
+        return state.get("done", 0)
+
+    def _save_state(self, done: int) -> None:
+        if self.state_file:
+            self.state_file.write_text(
+                json.dumps({"page_size": self.page_size, "done": done}), "utf-8"
+            )
+
+    # ── запросы ─────────────────────────────────────
+    async def _fetch(self, page_num: int, page_size: int) -> Dict:
+        await self._throttle()
+        data = await self.client.api_get(
+            GOODS_PATH, game=self.game, page_num=page_num, page_size=page_size, **self.params
+        )
+        if not isinstance(data, dict) or data.get("code") != "OK":
+            code = data.get("code") if isinstance(data, dict) else data
+            raise PageError(f"page {page_num}/{page_size}: {code}")
+        return data["data"]
+
+    async def _fetch_items(self, page_num: int, page_size: int) -> List[Dict]:
+        # страница p размера s == страницы 2p-1 и 2p размера s/2:
+        # после неудач дробим страницу, смещения товаров не меняются
+        for attempt in range(self.retries):
+            try:
+                return (await self._fetch(page_num, page_size)).get("items", [])
+            except Exception as e:
+                if self.debug:
+                    print(f"[CRAWL] {e} (попытка {attempt + 1})")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        half = page_size // 2
+        if half < self.min_page_size or page_size % 2:
+            raise PageError(f"page {page_num}/{page_size}: попытки исчерпаны")
+        left = await self._fetch_items(2 * page_num - 1, half)
+        right = await self._fetch_items(2 * page_num, half)
+        return left + right
+
+    async def _first_page(self, page_num: int, fixed: bool) -> Dict:
+        # подбираем page_size по первой странице, если не продолжаем старый обход
+        while True:
+            try:
+                return await self._fetch(page_num, self.page_size)
+            except Exception as e:
+                if fixed or self.page_size // 2 < self.min_page_size:
+                    raise
+                self.page_size //= 2
+                if self.debug:
+                    print(f"[CRAWL] {e}, уменьшаем page_size до {self.page_size}")
+
+    # ── public ──────────────────────────────────────
+    async def crawl(self) -> AsyncIterator[Dict]:
+        done = self._load_state()
+        first = await self._first_page(done + 1, fixed=done > 0)
+        self.total_page = first.get("total_page", done + 1)
+        for item in first.get("items", []):
+            yield item
+
+        finished: Set[int] = {done + 1}
+        pages = iter(range(done + 2, self.total_page + 1))
+        out: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self.failed = []
+
+        def advance() -> None:
+            nonlocal done
+            while done + 1 in finished:
+                finished.discard(done + 1)
+                done += 1
+            self._save_state(done)
+
+        async def worker() -> None:
+            for page in pages:
+                try:
+                    items = await self._fetch_items(page, self.page_size)
+                except Exception as e:
+                    self.failed.append(page)
+                    if self.debug:
+                        print(f"[CRAWL] страница {page} пропущена: {e}")
+                    continue
+                for item in items:
+                    await out.put(item)
+                await out.put(page)     # маркер: страница отдана целиком
+
+        async def run() -> None:
+            try:
+                await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            finally:
+                await out.put(None)
+
+        advance()
+        runner = asyncio.create_task(run())
+        try:
+            while (msg := await out.get()) is not None:
+                if isinstance(msg, int):
+                    finished.add(msg)
+                    advance()
+                else:
+                    yield msg
+        finally:
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+        # полный проход завершён — следующий начнётся с начала
+        if self.state_file and not self.failed and done >= self.total_page:
+            self.state_file.unlink(missing_ok=True)
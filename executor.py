@@ -0,0 +1,118 @@
+import asyncio, time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from jsonstream import dumps
+
+# пути Buff для операций записи
+PATHS = {
+    "buy": "/api/market/goods/buy",
+    "buy_order": "/api/market/buy_order/create",
+    "list": "/api/market/sell_order/create/manual_plus",
+    "change_price": "/api/market/sell_order/change",
+    "cancel": "/api/market/sell_order/cancel",
+}
+
+
+@dataclass
+class Operation:
+    kind: str                       # ключ из PATHS
+    payload: Dict[str, Any]
+    account: Optional[str] = None   # None — если аккаунт один
+    tag: Any = None                 # метка вызывающего, возвращается в результате
+
+
+@dataclass
+class OpResult:
+    op: Operation
+    ok: bool = False
+    code: str = ""
+    data: Any = None
+    error: str = ""
+    queued: float = 0.0             # ожидание очереди/лимита, секунд
+    latency: float = 0.0            # сам POST, секунд
+
+
+class BatchExecutor:
+    def __init__(self, clients: Dict[str, Any], *, pool=None, concurrency: int = 16, debug: bool = False):
+        # clients: login → BuffClient
+        # pool: AccountPool — клиенты берутся из него на каждом run(), refresh меняет BuffClient
+        self.clients = clients
+        self.pool = pool
+        self.concurrency = concurrency
+        self.debug = debug
+        self._headers: Dict[str, Dict[str, str]] = {}
+        self._owners: Dict[str, Any] = {}     # login → BuffClient, для которого собраны заголовки
+
+    @classmethod
+    def from_pool(cls, pool, **kw) -> "BatchExecutor":
+        return cls({a.login: a.buff for a in pool.ready()}, pool=pool, **kw)
+
+    def _account(self, op: Operation) -> str:
+        if op.account is not None:
+            return op.account
+        if len(self.clients) == 1:
+            return next(iter(self.clients))
+        raise ValueError("Operation.account обязателен, когда аккаунтов несколько")
+
+    async def prepare(self) -> None:
+        # CSRF и заголовки — один раз на клиента; соединения к Buff открываем заранее.
+        # После перелогина в пуле у аккаунта новый клиент: старый уже закрыт, его заголовки устарели
+        from connectors import prewarm
+
+        if self.pool is not None:
+            self.clients = {a.login: a.buff for a in self.pool.ready()}
+        fresh = []
+        for login, buff in self.clients.items():
+            if self._owners.get(login) is not buff:
+                self._headers[login] = buff.post_headers()
+                self._owners[login] = buff
+                fresh.append(buff)
+        await asyncio.gather(*(
+            prewarm(b.sess, b.proxy, b.proxy_auth, ("https://buff.163.com/",))
+            for b in fresh
+        ))
+
+    async def run(self, ops: Iterable[Operation]) -> List[OpResult]:
+        await self.prepare()
+        t0 = time.perf_counter()
+        sem = asyncio.Semaphore(self.concurrency)
+
+        # тело запроса сериализуем до старта, на горячем пути только POST
+        results: List[OpResult] = []
+        chains: Dict[str, List[tuple]] = defaultdict(list)
+        for op in ops:
+            res = OpResult(op)
+            results.append(res)
+            try:
+                login = self._account(op)
+                if login not in self.clients:
+                    raise KeyError(f"нет клиента для {login}")
+                chains[login].append((res, PATHS[op.kind], dumps(op.payload)))
+            except (KeyError, ValueError) as e:
+                res.error = f"{type(e).__name__}: {e}"
+
+        async def chain(login: str, items: List[tuple]) -> None:
+            # операции одного аккаунта — строго по порядку
+            buff = self.clients[login]
+            headers = self._headers[login]
+            for res, path, body in items:
+                async with sem:
+                    start = time.perf_counter()
+                    res.queued = start - t0
+                    try:
+                        res.data = await buff.api_post(path, body=body, headers=headers)
+                        data = res.data if isinstance(res.data, dict) else {}
+                        res.code = data.get("code") or ""
+                        res.ok = res.code == "OK"
+                        if not res.ok:
+                            res.error = data.get("error") or data.get("msg") or ""
+                    except Exception as e:
+                        res.error = f"{type(e).__name__}: {e}"
+                    res.latency = time.perf_counter() - start
+                if self.debug:
+                    print(f"[EXEC] {login} {res.op.kind}: {res.code or res.error} ({res.latency * 1000:.0f}ms)")
+
+        await asyncio.gather(*(chain(l, items) for l, items in chains.items()))
+        return results
@@ -0,0 +1,195 @@
+import sys, time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from tracker import item_state
+
+# необязательная зависимость: без numpy индекс недоступен, остальное работает
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# столбцы: цены в фэнях, как в tracker.item_state
+COLUMNS = {
+    "goods_id": "int64",
+    "sell": "int64",            # sell_min_price
+    "buy": "int64",             # buy_max_price
+    "sell_num": "int32",
+    "buy_num": "int32",
+    "name": "int32",            # номер в таблице имён
+    "updated": "float64",
+    "alive": "bool",
+}
+INITIAL = 1024
+BATCH = 1000
+
+
+class GoodsIndex:
+    def __init__(self, capacity: int = INITIAL):
+        if np is None:
+            raise RuntimeError("numpy не установлен")
+        self.cols = {c: np.zeros(capacity, dtype=t) for c, t in COLUMNS.items()}
+        self.size = 0                   # занятые строки, включая удалённые
+        self.rows: Dict[int, int] = {}  # goods_id → строка
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def col(self, name: str):
+        # занятые строки столбца, срез без копии
+        return self.cols[name][:self.size]
+
+    def _grow(self, need: int) -> None:
+        cap = len(self.cols["goods_id"])
+        if need <= cap:
+            return
+        cap = max(1, cap)               # с capacity=0 удвоение не сдвинется с места
+        while cap < need:
+            cap *= 2
+        for c, arr in self.cols.items():
+            new = np.zeros(cap, dtype=arr.dtype)
+            new[:self.size] = arr[:self.size]
+            self.cols[c] = new
+
+    def _intern(self, name: str) -> int:
+        i = self._name_ids.get(name)
+        if i is None:
+            i = self._name_ids[name] = len(self.names)
+            self.names.append(sys.intern(name))
+        return i
+
+    # ── запись ──────────────────────────────────────
+    def update(self, items: Iterable[Dict]) -> int:
+        # пачка товаров из /api/market/goods; новые дописываются в конец, старые — на месте
+        ids, states, names = [], [], []
+        for it in items:
+            ids.append(int(it["id"]))
+            states.append(item_state(it))
+            names.append(self._intern(it.get("name") or it.get("market_hash_name") or ""))
+        if not ids:
+            return 0
+        rows = np.empty(len(ids), dtype=np.int64)
+        fresh = 0
+        for k, gid in enumerate(ids):
+            row = self.rows.get(gid)
+            if row is None:
+                row = self.rows[gid] = self.size + fresh
+                fresh += 1
+            rows[k] = row
+        self._grow(self.size + fresh)
+        self.size += fresh
+
+        st = np.array(states, dtype=np.int64).reshape(-1, 4)
+        c = self.cols
+        c["goods_id"][rows] = ids
+        c["sell"][rows], c["buy"][rows] = st[:, 0], st[:, 1]
+        c["sell_num"][rows], c["buy_num"][rows] = st[:, 2], st[:, 3]
+        c["name"][rows] = names
+        c["updated"][rows] = time.time()
+        c["alive"][rows] = True
+        return len(ids)
+
+    def remove(self, goods_ids: Iterable[int]) -> None:
+        # строка остаётся, пока compact() не уплотнит массивы
+        for gid in goods_ids:
+            row = self.rows.pop(int(gid), None)
+            if row is not None:
+                self.cols["alive"][row] = False
+
+    def compact(self) -> None:
+        keep = np.flatnonzero(self.col("alive"))
+        for c, arr in self.cols.items():
+            arr[:len(keep)] = arr[keep]
+        self.size = len(keep)
+        self.rows = dict(zip(self.col("goods_id").tolist(), range(self.size)))
+
+    async def load(self, crawler, batch: int = BATCH) -> int:
+        # весь обход crawler.crawl() пачками по batch
+        n, buf = 0, []
+        async for item in crawler.crawl():
+            buf.append(item)
+            if len(buf) >= batch:
+                n += self.update(buf)
+                buf = []
+        return n + self.update(buf)
+
+    # ── чтение ──────────────────────────────────────
+    def spread(self):
+        # (sell - buy) / sell, доля; у товаров без цены продажи — 0
+        sell = self.col("sell").astype(np.float64)
+        out = np.zeros_like(sell)
+        np.divide(sell - self.col("buy"), sell, out=out, where=sell > 0)
+        return out
+
+    def query(
+        self,
+        *,
+        min_spread: Optional[float] = None,     # проценты
+        max_spread: Optional[float] = None,
+        min_volume: Optional[int] = None,       # sell_num + buy_num
+        min_sell_num: Optional[int] = None,
+        min_buy_num: Optional[int] = None,
+        min_price: Optional[float] = None,      # юани, по sell_min_price
+        max_price: Optional[float] = None,
+        order: str = "-spread",                 # столбец или spread/volume; "-" — по убыванию
+        limit: Optional[int] = None,
+    ):
+        # строки, прошедшие все фильтры, в порядке order
+        mask = self.col("alive").copy()
+        spread = None
+        if min_spread is not None or max_spread is not None or order.lstrip("-") == "spread":
+            spread = self.spread()
+        if min_spread is not None:
+            mask &= spread >= min_spread / 100
+        if max_spread is not None:
+            mask &= spread <= max_spread / 100
+        volume = self.col("sell_num").astype(np.int64) + self.col("buy_num")
+        if min_volume is not None:
+            mask &= volume >= min_volume
+        if min_sell_num is not None:
+            mask &= self.col("sell_num") >= min_sell_num
+        if min_buy_num is not None:
+            mask &= self.col("buy_num") >= min_buy_num
+        if min_price is not None:
+            mask &= self.col("sell") >= round(min_price * 100)
+        if max_price is not None:
+            mask &= self.col("sell") <= round(max_price * 100)
+
+        key = order.lstrip("-")
+        if key not in COLUMNS and key not in ("spread", "volume"):
+            raise ValueError(f"Неизвестный столбец: {key}")
+        rows = np.flatnonzero(mask)
+        values = {"spread": spread, "volume": volume}.get(key)
+        if values is None:
+            values = self.col(key)
+        values = values[rows]
+        idx = np.argsort(-values if order.startswith("-") else values, kind="stable")
+        if limit is not None:
+            idx = idx[:limit]
+        return rows[idx]
+
+    def get(self, goods_id: int) -> Optional[Dict]:
+        row = self.rows.get(int(goods_id))
+        return None if row is None else self.records([row])[0]
+
+    def records(self, rows: Sequence[int]) -> List[Dict]:
+        # строки → словари (цены обратно в юанях) для вывода
+        c = self.cols
+        out = []
+        for r in rows:
+            sell, buy = int(c["sell"][r]), int(c["buy"][r])
+            out.append({
+                "id": int(c["goods_id"][r]),
+                "name": self.names[c["name"][r]],
+                "sell_min_price": sell / 100,
+                "buy_max_price": buy / 100,
+                "sell_num": int(c["sell_num"][r]),
+                "buy_num": int(c["buy_num"][r]),
+                "spread": round((sell - buy) / sell * 100, 2) if sell else 0.0,
+            })
+        return out
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.cols.values())
@@ -0,0 +1,65 @@
+import base64, hmac, hashlib, struct, time
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+_CHARS = "23456789BCDFGHJKMNPQRTVWXY"
+QUERY_TIME = "https://api.steampowered.com/ITwoFactorService/QueryTime/v0001"
+SYNC_TTL = 3600.0
+
+# разница между часами Steam и локальными, общая для всех аккаунтов
+_offset: Optional[int] = None
+_synced_at = 0.0
+
+
+def server_time() -> int:
+    return int(time.time()) + (_offset or 0)
+
+
+def is_synced() -> bool:
+    return _offset is not None and time.monotonic() - _synced_at < SYNC_TTL
+
+
+async def sync_time(sess, proxy=None, proxy_auth=None, *, force: bool = False) -> int:
+    # один запрос раз в SYNC_TTL; при ошибке остаёмся на локальных часах
+    global _offset, _synced_at
+    if force or not is_synced():
+        try:
+            async with sess.post(QUERY_TIME, proxy=proxy, proxy_auth=proxy_auth) as r:
+                data = await r.json(content_type=None)
+            _offset = int(data["response"]["server_time"]) - int(time.time())
+            _synced_at = time.monotonic()
+        except Exception:
+            pass
+    return _offset or 0
+
+
+class SteamGuard:
+    def __init__(self, shared_secret: str):
+        self.key = base64.b64decode(shared_secret)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def for_secret(shared_secret: str) -> "SteamGuard":
+        return SteamGuard(shared_secret)
+
+    def code(self, ts: Optional[int] = None) -> str:
+        ts = server_time() if ts is None else ts
+        msg = struct.pack(">Q", ts // 30)
+        dig = hmac.new(self.key, msg, hashlib.sha1).digest()
+        off = dig[-1] & 0x0F
+        code_int = struct.unpack(">I", dig[off : off + 4])[0] & 0x7FFFFFFF
+        out = []
+        for _ in range(5):
+            code_int, idx = divmod(code_int, len(_CHARS))
+            out.append(_CHARS[idx])
+        return "".join(out)
+
+    def window(self, ts: Optional[int] = None) -> Iterable[str]:
+        # текущий код и соседние — на случай несинхронизированных часов
+        ts = server_time() if ts is None else ts
+        return [self.code(ts + d) for d in (0, -30, 30)]
+
+
+def bulk_codes(secrets: Dict[str, str], ts: Optional[int] = None) -> Dict[str, str]:
+    ts = server_time() if ts is None else ts
+    return {acc: SteamGuard.for_secret(s).code(ts) for acc, s in secrets.items()}
@@ -0,0 +1,129 @@
+import asyncio, time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+INVENTORY_PATH = "/api/market/steam_inventory"
+
+
+def asset_key(item: Dict) -> str:
+    asset = item.get("asset_info") or {}
+    return str(item.get("assetid") or asset.get("assetid") or item.get("id"))
+
+
+@dataclass
+class InventoryDiff:
+    added: List[Dict] = field(default_factory=list)
+    removed: List[Dict] = field(default_factory=list)
+    changed: List[Dict] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+@dataclass
+class _Entry:
+    items: Dict[str, Dict]
+    fetched_at: float
+    diff: InventoryDiff
+    stale: bool = False             # invalidate() — следующий запрос с force=1
+
+
+class InventoryService:
+    def __init__(
+        self,
+        pool,
+        *,
+        game: str = "csgo",
+        ttl: float = 300.0,
+        concurrency: int = 8,
+        fields: Optional[Sequence[str]] = None,
+        debug: bool = False,
+    ):
+        self.pool = pool
+        self.game = game
+        self.ttl = ttl
+        self.fields = fields
+        self.debug = debug
+        self._sem = asyncio.Semaphore(concurrency)
+        self._cache: Dict[str, _Entry] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _account(self, login: str):
+        for acc in self.pool.accounts:
+            if acc.login == login:
+                return acc
+        raise KeyError(login)
+
+    def is_fresh(self, login: str) -> bool:
+        e = self._cache.get(login)
+        return e is not None and not e.stale and time.monotonic() - e.fetched_at < self.ttl
+
+    # ── загрузка ────────────────────────────────────
+    async def _fetch(self, login: str) -> _Entry:
+        acc = self._account(login)
+        old = self._cache.get(login)
+        # force=1 заставляет Buff перечитать Steam — только если наш кэш устарел
+        force = "1" if old is not None else "0"
+        async with self._sem:
+            items = {}
+            async for it in acc.buff.api_stream(
+                INVENTORY_PATH, fields=self.fields, game=self.game, force=force,
+            ):
+                items[asset_key(it)] = it
+
+        diff = InventoryDiff()
+        if old is not None:
+            for k, it in items.items():
+                prev = old.items.get(k)
+                if prev is None:
+                    diff.added.append(it)
+                elif prev != it:
+                    diff.changed.append(it)
+            diff.removed = [it for k, it in old.items.items() if k not in items]
+
+        entry = self._cache[login] = _Entry(items, time.monotonic(), diff)
+        if self.debug:
+            print(f"[INV] {login}: {len(items)} предметов (force={force}), "
+                  f"+{len(diff.added)} -{len(diff.removed)} ~{len(diff.changed)}")
+        return entry
+
+    async def refresh(self, login: str) -> _Entry:
+        # параллельные запросы одного аккаунта делят одну загрузку
+        task = self._inflight.get(login)
+        if task is None:
+            task = self._inflight[login] = asyncio.create_task(self._fetch(login))
+            task.add_done_callback(lambda _: self._inflight.pop(login, None))
+        return await asyncio.shield(task)
+
+    async def refresh_all(self, *, only_stale: bool = True) -> Dict[str, InventoryDiff]:
+        logins = [a.login for a in self.pool.ready()
+                  if not (only_stale and self.is_fresh(a.login))]
+        results = await asyncio.gather(*(self.refresh(l) for l in logins), return_exceptions=True)
+        out = {}
+        for login, res in zip(logins, results):
+            if isinstance(res, BaseException):
+                if self.debug:
+                    print(f"[INV] {login}: {type(res).__name__}: {res}")
+            else:
+                out[login] = res.diff
+        return out
+
+    # ── чтение ──────────────────────────────────────
+    def cached(self, login: str) -> Optional[Dict[str, Dict]]:
+        # без сети, даже если устарело
+        e = self._cache.get(login)
+        return e.items if e else None
+
+    async def get(self, login: str) -> Dict[str, Dict]:
+        if self.is_fresh(login):
+            return self._cache[login].items
+        return (await self.refresh(login)).items
+
+    def diff(self, login: str) -> InventoryDiff:
+        e = self._cache.get(login)
+        return e.diff if e else InventoryDiff()
+
+    def invalidate(self, login: Optional[str] = None) -> None:
+        for l, e in self._cache.items():
+            if login is None or l == login:
+                e.stale = True
@@ -0,0 +1,154 @@
+import codecs, json, re
+from typing import AsyncIterator, Dict, Optional, Sequence
+
+# необязательные быстрые бэкенды
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ijson
+except ImportError:
+    ijson = None
+# "auto" берёт ijson только с C-бэкендом: чистый python-бэкенд в разы медленнее
+# встроенного разбора (замер: python bench.py --stream)
+IJSON_FAST = ijson is not None and getattr(ijson, "backend", "") == "yajl2_c"
+
+CHUNK = 64 * 1024
+_ITEMS = re.compile(r'"items"\s*:\s*\[')
+_CODE = re.compile(r'"code"\s*:\s*"([^"]*)"')
+_decoder = json.JSONDecoder()
+
+
+def loads(raw: bytes | str):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def project(item: Dict, fields: Optional[Sequence[str]]) -> Dict:
+    if not fields:
+        return item
+    return {k: item[k] for k in fields if k in item}
+
+
+class StreamError(RuntimeError):
+    def __init__(self, msg: str, code: Optional[str] = None):
+        super().__init__(msg)
+        self.code = code
+
+
+class _Head:
+    # читает насквозь и запоминает начало ответа: code лежит перед data.items
+    def __init__(self, reader, keep: int = CHUNK):
+        self.reader, self.keep, self.head = reader, keep, b""
+
+    async def read(self, n: int = -1) -> bytes:
+        chunk = await self.reader.read(n)
+        if len(self.head) < self.keep:
+            self.head += chunk[:self.keep - len(self.head)]
+        return chunk
+
+
+def _check_head(head: bytes, found: bool) -> None:
+    text = head.decode("utf-8", "replace")
+    m = _ITEMS.search(text)
+    code = _CODE.search(text, 0, m.start() if m else len(text))
+    if code and code.group(1) != "OK":
+        raise StreamError(f"Buff API: {code.group(1)}", code.group(1))
+    if not found and not m:
+        raise StreamError(f"items не найден в ответе: {text[:200]!r}")
+
+
+async def _iter_ijson(reader, prefix: str) -> AsyncIterator[Dict]:
+    # элементы собирает C-бэкенд ijson (items_async); code проверяем по началу ответа,
+    # до выдачи первого элемента
+    src = _Head(reader)
+    checked = False
+    try:
+        async for item in ijson.items_async(src, prefix + ".item", use_float=True):
+            if not checked:
+                _check_head(src.head, True)
+                checked = True
+            yield item
+    except ijson.JSONError as e:
+        _check_head(src.head, True)
+        raise StreamError(f"ответ оборвался или повреждён: {e}") from e
+    if not checked:
+        _check_head(src.head, False)
+
+
+async def _iter_scan(reader) -> AsyncIterator[Dict]:
+    # ищем начало массива items, дальше raw_decode по одному объекту:
+    # в памяти держим только недочитанный хвост
+    buf, eof = "", False
+    dec = codecs.getincrementaldecoder("utf-8")()   # символ может быть разрезан чанком
+
+    async def more() -> bool:
+        nonlocal buf, eof
+        chunk = await reader.read(CHUNK)
+        if not chunk:
+            eof = True
+            return False
+        buf += dec.decode(chunk)
+        return True
+
+    while not (m := _ITEMS.search(buf)):
+        if not await more():
+            # массива нет — обычно это ошибка вроде {"code": "Login Required"}
+            try:
+                data = json.loads(buf)
+            except ValueError:
+                raise StreamError(f"items не найден в ответе: {buf[:200]!r}")
+            code = data.get("code") if isinstance(data, dict) else None
+            raise StreamError(f"Buff API: {code if code else repr(data)}", code)
+
+    head = buf[:m.start()]
+    code = _CODE.search(head)
+    if code and code.group(1) != "OK":
+        raise StreamError(f"Buff API: {code.group(1)}", code.group(1))
+
+    buf, pos = buf[m.end():], 0
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buf):
+            buf, pos = "", 0
+            if not await more():
+                raise StreamError("ответ оборвался внутри items")
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof or not await more():
+                raise StreamError("ответ оборвался внутри items")
+            continue
+        yield item
+        buf, pos = buf[end:], 0
+
+
+async def iter_items(
+    reader,
+    *,
+    prefix: str = "data.items",
+    fields: Optional[Sequence[str]] = None,
+    backend: str = "auto",          # "auto" | "ijson" | "scan"
+) -> AsyncIterator[Dict]:
+    if backend == "ijson" and ijson is None:
+        raise RuntimeError("ijson не установлен")
+    # встроенный разбор умеет только data.items — другой prefix отдаём любому ijson
+    use_ijson = backend == "ijson" or backend == "auto" and ijson is not None and \
+        (IJSON_FAST or prefix != "data.items")
+    if not use_ijson and prefix != "data.items":
+        raise RuntimeError("встроенный разбор поддерживает только data.items")
+    it = _iter_ijson(reader, prefix) if use_ijson else _iter_scan(reader)
+    async for item in it:
+        yield project(item, fields)
@@ -1,6 +1,4 @@
-import asyncio
-from steam import SteamClient
-from buff import BuffClient
+# asyncio, steam, buff, prober импортируются по месту: cli.py читает отсюда только настройки
 # Прокси
 IP = ""  # Сюда IP
 PORTS = range(10000, 10010) # Порты
@@ -10,17 +8,32 @@ PASS = "RNW78Fm5" # Пароль от прокси
 LOGIN = "" # Логин
 PWD = "" # Пароль
 MAFILE = ".maFile"
+# Проверка портов
+CONCURRENCY = 8  # Сколько портов проверять одновременно
+WINNERS = 3  # Остановиться после N рабочих портов (None — проверить все)
+# Кэш сессий
+SESSION_DIR = ".sessions"  # Куда сохранять cookies
+SESSION_TTL = 12 * 3600  # Сколько секунд доверять сохранённой сессии
+
+def proxy_for(port: int) -> str:
+    return f"http://{USER}:{PASS}@{IP}:{port}"
 
 async def try_port(port: int, debug: bool = True) -> bool:
-    proxy = f"http://{USER}:{PASS}@{IP}:{port}"
+    from steam import SteamClient
+    from buff import BuffClient
+    from session_store import SessionStore, login_cached
+
+    proxy = proxy_for(port)
     print(f"\n{'=' * 60}")
     print(f"Пробуем порт {port}: {proxy}")
     print('=' * 60)
 
     steam = SteamClient(LOGIN, PWD, MAFILE, proxy=proxy, debug=debug)
+    store = SessionStore(SESSION_DIR, ttl=SESSION_TTL)
     try:
-        await steam.login()
-        print("Steam авторизация успешна")
+        buff = BuffClient(steam, debug=debug)
+        cookies = await login_cached(steam, buff, store)
+        print(f"Steam + BUFF авторизация успешна (cookies: {list(cookies.keys())})")
 
         if debug:
             print("\nПроверка Steam cookies:")
@@ -29,10 +42,6 @@ async def try_port(port: int, debug: bool = True) -> bool:
                 if any(name in cookie.key for name in important_cookies):
                     print(f"  - {cookie.key}: {cookie.value[:20]}... ({cookie.get('domain')})")
 
-        buff = BuffClient(steam, debug=debug)
-        cookies = await buff.login()
-        print(f"BUFF авторизация успешна (cookies: {list(cookies.keys())})")
-
         print("\nПроверка авторизации Buff:")
         try:
             data = await buff.api_get("/api/market/goods?game=csgo&page_num=1")
@@ -101,16 +110,21 @@ async def try_port(port: int, debug: bool = True) -> bool:
         await steam.close()
 
 async def main():
-    print("Начинаем поиск рабочего порта...\n")
+    from prober import probe_ports, format_table
+    from session_store import SessionStore
 
-    working_ports = []
+    print("Начинаем поиск рабочего порта...\n")
 
-    for p in PORTS:
-        if await try_port(p, debug=True):
-            working_ports.append(p)
-            print(f"\nНайден полностью рабочий порт: {p}")
-            break
+    results = await probe_ports(
+        PORTS, proxy_for, LOGIN, PWD, MAFILE,
+        concurrency=CONCURRENCY,
+        winners=WINNERS,
+        store=SessionStore(SESSION_DIR, ttl=SESSION_TTL),
+        debug=True,
+    )
+    print(format_table(results))
 
+    working_ports = [r.port for r in results if r.ok]
     if not working_ports:
         print("\nНе найдено портов с полной функциональностью")
         print("Но некоторые порты могут работать частично (авторизация проходит)")
@@ -119,4 +133,5 @@ async def main():
         print(f"Рекомендуется использовать порт: {working_ports[0]}")
 
 if __name__ == "__main__":
+    import asyncio
     asyncio.run(main())
@@ -0,0 +1,162 @@
+import json, time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Deque, Dict, List, Optional, Tuple
+
+STAGE = "stage_seconds"         # именованные стадии логина: labels stage=...
+HTTP = "http_phase_seconds"     # фазы каждого запроса: labels phase=dns|connect|ttfb|total
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, str]) -> Key:
+    return name, tuple(sorted(labels.items()))
+
+
+# ── приёмники ───────────────────────────────────
+class MemorySink:
+    # keep — какие метки оставить (остальные схлопываются), None — все
+    def __init__(self, maxlen: int = 10000, keep: Optional[Tuple[str, ...]] = None):
+        self.values: Dict[Key, Deque[float]] = defaultdict(lambda: deque(maxlen=maxlen))
+        self.keep = keep
+
+    def record(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        if self.keep is not None:
+            labels = {k: v for k, v in labels.items() if k in self.keep}
+        self.values[_key(name, labels)].append(value)
+
+    def quantile(self, name: str, q: float, **labels) -> Optional[float]:
+        vals = sorted(self.values.get(_key(name, labels), ()))
+        if not vals:
+            return None
+        return vals[min(len(vals) - 1, int(q * len(vals)))]
+
+    def summary(self) -> List[Dict]:
+        out = []
+        for (name, labels), vals in sorted(self.values.items()):
+            s = sorted(vals)
+            out.append({
+                "metric": name, **dict(labels), "count": len(s),
+                "p50": s[len(s) // 2], "p99": s[min(len(s) - 1, int(0.99 * len(s)))],
+                "max": s[-1],
+            })
+        return out
+
+
+class JsonlSink:
+    def __init__(self, path: str | Path):
+        self.fh = open(path, "a", encoding="utf-8", buffering=1)
+
+    def record(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        self.fh.write(json.dumps({"ts": time.time(), "metric": name, "value": value, **labels}) + "\n")
+
+    def close(self) -> None:
+        self.fh.close()
+
+
+class PrometheusSink:
+    def __init__(self, prefix: str = "buff_bot_", buckets=BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.counts: Dict[Key, List[int]] = {}
+        self.sums: Dict[Key, float] = defaultdict(float)
+
+    def record(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        k = _key(name, labels)
+        counts = self.counts.setdefault(k, [0] * (len(self.buckets) + 1))
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[k] += value
+
+    def exposition(self) -> str:
+        lines, typed = [], set()
+        for (name, labels), counts in sorted(self.counts.items()):
+            metric = self.prefix + name
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            lbl = ",".join(f'{k}="{v}"' for k, v in labels)
+            sep = "," if lbl else ""
+            acc = 0
+            for le, n in zip((*map(str, self.buckets), "+Inf"), counts):
+                acc += n
+                lines.append(f'{metric}_bucket{{{lbl}{sep}le="{le}"}} {acc}')
+            lines.append(f"{metric}_sum{{{lbl}}} {self.sums[(name, labels)]:.6f}")
+            lines.append(f"{metric}_count{{{lbl}}} {acc}")
+        return "\n".join(lines) + "\n"
+
+
+# ── фасад ───────────────────────────────────────
+class Metrics:
+    def __init__(self, *sinks, labels: Optional[Dict[str, str]] = None):
+        self.sinks = list(sinks)
+        self.labels = labels or {}
+
+    def bind(self, **labels) -> "Metrics":
+        m = Metrics(labels={**self.labels, **labels})
+        m.sinks = self.sinks                     # общий список: add_sink виден всем
+        return m
+
+    def add_sink(self, sink) -> None:
+        self.sinks.append(sink)
+
+    def record(self, name: str, value: float, **labels) -> None:
+        if self.sinks:
+            labels = {**self.labels, **labels}
+            for s in self.sinks:
+                s.record(name, value, labels)
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(STAGE, time.perf_counter() - t0, stage=stage, **labels)
+
+    def trace_config(self):
+        import aiohttp
+
+        def mark(attr):
+            async def hook(session, ctx: SimpleNamespace, params) -> None:
+                setattr(ctx, attr, time.perf_counter())
+            return hook
+
+        def phase(name, start, end):
+            async def hook(session, ctx: SimpleNamespace, params) -> None:
+                setattr(ctx, end, time.perf_counter())
+                t0 = getattr(ctx, start, None)
+                if t0 is not None and self.sinks:
+                    self.record(HTTP, getattr(ctx, end) - t0, phase=name, host=getattr(ctx, "host", ""))
+            return hook
+
+        async def on_start(session, ctx: SimpleNamespace, params) -> None:
+            ctx.host = params.url.host or ""
+            ctx.t_start = time.perf_counter()
+
+        async def on_stage(session, ctx: SimpleNamespace, params) -> None:
+            # запросы с trace_request_ctx={"stage": ...} считаются стадией целиком
+            req = ctx.trace_request_ctx
+            stage = req.get("stage") if isinstance(req, dict) else None
+            if stage and self.sinks:
+                self.record(STAGE, time.perf_counter() - ctx.t_start, stage=stage)
+
+        # connect — TCP + TLS (+ CONNECT через прокси): aiohttp не разделяет их
+        tc = aiohttp.TraceConfig()
+        tc.on_request_start.append(on_start)
+        tc.on_dns_resolvehost_start.append(mark("t_dns"))
+        tc.on_dns_resolvehost_end.append(phase("dns", "t_dns", "t_dns_end"))
+        tc.on_connection_create_start.append(mark("t_conn"))
+        tc.on_connection_create_end.append(phase("connect", "t_conn", "t_conn_end"))
+        tc.on_request_headers_sent.append(mark("t_sent"))
+        tc.on_request_end.append(phase("ttfb", "t_sent", "t_end"))
+        tc.on_request_end.append(phase("total", "t_start", "t_total"))
+        tc.on_request_end.append(on_stage)
+        tc.on_request_exception.append(on_stage)
+        return tc
+
+
+DEFAULT = Metrics()
@@ -0,0 +1,314 @@
+import asyncio, base64, random, socket, time
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import quote, urlencode
+
+import aiohttp, rsa
+from aiohttp import web
+from aiohttp.abc import AbstractResolver
+
+from guard import SteamGuard
+
+# Локальная замена Steam и Buff для бенчмарков и отладки без сети.
+# Клиенты ходят на настоящие https-адреса, MockConnector направляет их на этот сервер
+# обычным HTTP, а сервер различает сайты по заголовку Host.
+# Логин эмулируется только на steamcommunity.com: store.steampowered.com отвечает 404,
+# и SteamClient переходит к следующему адресу, как при отказе настоящего store.
+
+SHARED_SECRET = base64.b64encode(b"mock-shared-secret!!").decode()
+PASSWORD = "mock-password"
+RETURN_TO = "https://buff.163.com/account/login/steam/verification?back_url=/"
+
+
+class _LocalResolver(AbstractResolver):
+    def __init__(self, port: int, host: str = "127.0.0.1"):
+        self.port, self.host = port, host
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET):
+        return [{
+            "hostname": host, "host": self.host, "port": self.port,
+            "family": socket.AF_INET, "proto": 0, "flags": socket.AI_NUMERICHOST,
+        }]
+
+    async def close(self) -> None:
+        pass
+
+
+class MockConnector(aiohttp.TCPConnector):
+    # все хосты → локальный сервер, TLS отключён
+    def __init__(self, port: int, **kw):
+        super().__init__(resolver=_LocalResolver(port), **kw)
+
+    def _get_ssl_context(self, req):
+        return None
+
+
+def _host(request: web.Request) -> str:
+    return (request.host or "").split(":")[0]
+
+
+class MockSteamBuff:
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,           # задержка на каждый запрос, секунд
+        jitter: float = 0.0,
+        total_goods: int = 2000,
+        page_cap: int = 80,
+        session_ttl: float = 0.0,       # >0 — сессии Buff истекают через столько секунд
+        shared_secret: str = SHARED_SECRET,
+    ):
+        self.latency, self.jitter = latency, jitter
+        self.total_goods, self.page_cap = total_goods, page_cap
+        self.session_ttl = session_ttl
+        self.sessions: Dict[str, float] = {}    # session → monotonic выдачи
+        self.guard = SteamGuard(shared_secret)
+        self.pub, self.priv = rsa.newkeys(512)
+        self.hits: Counter = Counter()
+        self.runner: Optional[web.AppRunner] = None
+        self.port = 0
+        self.routes = {
+            ("steamcommunity.com", "GET", "/login/"): self.login_page,
+            ("steamcommunity.com", "POST", "/login/getrsakey/"): self.getrsakey,
+            ("steamcommunity.com", "POST", "/login/dologin/"): self.dologin,
+            ("api.steampowered.com", "POST", "/ITwoFactorService/QueryTime/v0001"): self.query_time,
+            ("steamcommunity.com", "POST", "/openid/login"): self.openid_post,
+            ("steamcommunity.com", "GET", "/openid/login"): self.openid_form,
+            ("buff.163.com", "GET", "/account/login/steam"): self.buff_login,
+            ("buff.163.com", "GET", "/account/login/steam/verification"): self.buff_callback,
+            ("buff.163.com", "GET", "/"): self.buff_home,
+            ("buff.163.com", "GET", "/account/api/user/info"): self.user_info,
+            ("buff.163.com", "GET", "/api/market/goods"): self.goods,
+            ("buff.163.com", "GET", "/api/market/steam_inventory"): self.steam_inventory,
+            ("buff.163.com", "POST", "/api/market/goods/buy"): self.write_op,
+            ("buff.163.com", "POST", "/api/market/buy_order/create"): self.write_op,
+            ("buff.163.com", "POST", "/api/market/sell_order/create/manual_plus"): self.write_op,
+            ("buff.163.com", "POST", "/api/market/sell_order/change"): self.write_op,
+            ("buff.163.com", "POST", "/api/market/sell_order/cancel"): self.write_op,
+            ("buff.163.com", "GET", "/api/message/notification"): self.notification,
+        }
+        self.inventory_rev: Counter = Counter()
+        self.events: List[Dict] = []            # уведомления для long-poll, id по порядку
+        self._new_event: Optional[asyncio.Event] = None
+
+    # ── сервер ──────────────────────────────────────
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.dispatch)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self.runner = web.AppRunner(self.app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.port
+
+    def connector(self, **kw) -> MockConnector:
+        return MockConnector(self.port, **kw)
+
+    async def close(self) -> None:
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def dispatch(self, request: web.Request) -> web.StreamResponse:
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        key = (_host(request), request.method, request.path)
+        self.hits[key] += 1
+        handler = self.routes.get(key)
+        if handler is None:
+            return web.json_response({"code": "Not Found"}, status=404)
+        return await handler(request)
+
+    # ── Steam ───────────────────────────────────────
+    async def login_page(self, request):
+        resp = web.Response(text="<html>login</html>", content_type="text/html")
+        resp.set_cookie("sessionid", f"{random.getrandbits(64):016x}", secure=True)
+        return resp
+
+    async def query_time(self, request):
+        return web.json_response({"response": {"server_time": str(int(time.time()))}})
+
+    async def getrsakey(self, request):
+        return web.json_response({
+            "success": True,
+            "publickey_mod": f"{self.pub.n:x}",
+            "publickey_exp": f"{self.pub.e:x}",
+            "timestamp": str(int(time.time() * 1000)),
+        })
+
+    async def dologin(self, request):
+        form = await request.post()
+        try:
+            pwd = rsa.decrypt(base64.b64decode(form.get("password", "")), self.priv).decode()
+        except (rsa.DecryptionError, ValueError):
+            pwd = ""
+        if pwd != PASSWORD:
+            return web.json_response({"success": False, "message": "The account name or password is incorrect."})
+        if form.get("twofactorcode") not in self.guard.window():
+            return web.json_response({"success": False, "requires_twofactor": True})
+        resp = web.json_response({"success": True, "login_complete": True})
+        resp.set_cookie("steamLoginSecure", f"{form['username']}%7C%7Cmock", secure=True, httponly=True)
+        return resp
+
+    async def openid_post(self, request):
+        form = await request.post()
+        if "steamLoginSecure" not in request.cookies:
+            return web.Response(text="<html>Sign in</html>", content_type="text/html")
+        if form.get("action") == "steam_openid_login":
+            # подтверждённая форма — обратно на Buff
+            sep = "&" if "?" in RETURN_TO else "?"
+            return web.HTTPFound(RETURN_TO + sep + urlencode({
+                "openid.mode": "id_res",
+                "openid.claimed_id": "https://steamcommunity.com/openid/id/76561190000000000",
+            }))
+        # первый POST: Steam отдаёт страницу с формой подтверждения
+        blob = base64.urlsafe_b64encode(urlencode(dict(form)).encode()).decode()
+        return web.HTTPFound("/openid/login?" + urlencode({"openid.mode": "checkid_setup", "openidparams": blob}))
+
+    async def openid_form(self, request):
+        fields = {
+            "action": "steam_openid_login",
+            "openid.mode": "checkid_setup",
+            "openidparams": request.query.get("openidparams", ""),
+            "nonce": f"{random.getrandbits(64):016x}",
+        }
+        inputs = "".join(
+            f'<input type="hidden" name="{k}" value="{v}" />' for k, v in fields.items()
+        )
+        html = (
+            '<html><head><script>g_steamID = "76561190000000000";</script></head><body>'
+            '<form action="/search" method="get"><input name="q" value=""></form>'
+            f'<form id="openidForm" action="https://steamcommunity.com/openid/login" method="POST">'
+            f'{inputs}<input type="submit" id="imageLogin" value="Sign In"></form>'
+            "</body></html>"
+        )
+        return web.Response(text=html, content_type="text/html")
+
+    # ── Buff ────────────────────────────────────────
+    async def buff_login(self, request):
+        params = {
+            "openid.ns": "http://specs.openid.net/auth/2.0",
+            "openid.mode": "checkid_setup",
+            "openid.return_to": RETURN_TO,
+            "openid.realm": "https://buff.163.com/",
+            "openid.identity": "http://specs.openid.net/auth/2.0/identifier_select",
+            "openid.claimed_id": "http://specs.openid.net/auth/2.0/identifier_select",
+        }
+        goto = quote("openid/login?" + urlencode(params), safe="")
+        return web.HTTPFound(f"https://steamcommunity.com/login/home/?goto={goto}")
+
+    async def buff_callback(self, request):
+        if request.query.get("openid.mode") != "id_res":
+            return web.HTTPFound("/")
+        resp = web.HTTPFound("/")
+        sess = f"1-{random.getrandbits(96):024x}"
+        self.sessions[sess] = time.monotonic()
+        resp.set_cookie("session", sess, httponly=True)
+        resp.set_cookie("csrf_token", f"{random.getrandbits(128):032x}")
+        return resp
+
+    async def buff_home(self, request):
+        return web.Response(text="<html>buff</html>", content_type="text/html")
+
+    def _authed(self, request) -> bool:
+        sess = request.cookies.get("session")
+        if sess is None:
+            return False
+        if self.session_ttl:
+            issued = self.sessions.get(sess)
+            return issued is not None and time.monotonic() - issued < self.session_ttl
+        return True
+
+    async def user_info(self, request):
+        if not self._authed(request):
+            return web.json_response({"code": "Login Required"})
+        return web.json_response({"code": "OK", "data": {"nickname": "mock"}})
+
+    def goods_item(self, i: int) -> Dict:
+        rnd = random.Random(i)
+        price = round(rnd.uniform(0.1, 5000), 2)
+        return {
+            "id": i + 1,
+            "name": f"Mock Item {i + 1}",
+            "market_hash_name": f"Mock Item {i + 1}",
+            "sell_min_price": f"{price:.2f}",
+            "buy_max_price": f"{price * rnd.uniform(0.7, 0.98):.2f}",
+            "sell_num": rnd.randint(0, 500),
+            "buy_num": rnd.randint(0, 300),
+        }
+
+    async def goods(self, request):
+        if not self._authed(request):
+            return web.json_response({"code": "Login Required"})
+        page = max(1, int(request.query.get("page_num", 1)))
+        size = min(self.page_cap, max(1, int(request.query.get("page_size", 20))))
+        start = (page - 1) * size
+        items = [self.goods_item(i) for i in range(start, min(self.total_goods, start + size))]
+        return web.json_response({"code": "OK", "data": {
+            "items": items,
+            "page_num": page,
+            "page_size": size,
+            "total_count": self.total_goods,
+            "total_page": -(-self.total_goods // size),
+        }})
+
+    async def steam_inventory(self, request):
+        if not self._authed(request):
+            return web.json_response({"code": "Login Required"})
+        sess = request.cookies["session"]
+        # force=1 «перечитывает Steam»: один предмет уходит, один появляется
+        if request.query.get("force") == "1":
+            self.inventory_rev[sess] += 1
+        rev = self.inventory_rev[sess]
+        items = [
+            {
+                "asset_info": {"assetid": f"{sess[-6:]}{i}", "classid": str(i)},
+                "goods_id": i % 50 + 1,
+                "state": 0,
+            }
+            for i in range(rev, rev + 30)
+        ]
+        return web.json_response({"code": "OK", "data": {"items": items, "total_count": len(items)}})
+
+    async def write_op(self, request):
+        if not self._authed(request):
+            return web.json_response({"code": "Login Required"})
+        if request.headers.get("X-CSRFToken") != request.cookies.get("csrf_token"):
+            return web.json_response({"code": "CSRF Failure", "error": "csrf token mismatch"})
+        payload = await request.json()
+        if request.path == "/api/market/goods/buy":
+            self.push_event("buy_success", goods_id=payload.get("goods_id"), price=payload.get("price"))
+        return web.json_response({"code": "OK", "data": {"path": request.path, "echo": payload}})
+
+    # ── уведомления (long-poll) ─────────────────────
+    def push_event(self, type: str, **data) -> Dict:
+        ev = {"id": len(self.events) + 1, "type": type, "created_at": time.time(), **data}
+        self.events.append(ev)
+        if self._new_event is not None:
+            self._new_event.set()
+            self._new_event = None
+        return ev
+
+    async def notification(self, request):
+        if not self._authed(request):
+            return web.json_response({"code": "Login Required"})
+        since = int(request.query.get("since", 0))
+        deadline = time.monotonic() + min(60.0, float(request.query.get("timeout", 25)))
+        while len(self.events) <= since:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            if self._new_event is None:
+                self._new_event = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._new_event.wait(), left)
+            except asyncio.TimeoutError:
+                break
+        items = self.events[since:since + 100]
+        return web.json_response({"code": "OK", "data": {
+            "items": items,
+            "cursor": items[-1]["id"] if items else since,
+        }})
@@ -0,0 +1,220 @@
+import asyncio, time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+import ratelimit
+
+# Buff не даёт публичного push-канала, поэтому уведомления читаются long-poll'ом:
+# сервер держит запрос, пока не появится событие новее курсора или не выйдет timeout.
+# Если сервер отвечает сразу, канал деградирует до опроса раз в min_interval.
+NOTIFY_PATH = "/api/message/notification"
+POLL_TIMEOUT = 25.0
+MIN_INTERVAL = 5.0          # если ответ пришёл сразу и пустой — не чаще раза в столько секунд
+QUEUE_SIZE = 100
+
+
+@dataclass
+class Event:
+    account: str
+    id: int
+    type: str                       # buy_success, sell_success, trade_offer, buy_order_filled…
+    data: Dict[str, Any] = field(default_factory=dict)
+    received_at: float = field(default_factory=time.time)
+
+
+class Subscription:
+    # overflow: "block" — медленный подписчик тормозит канал (события ждут на сервере),
+    #           "drop_oldest" — канал не ждёт, старые события выбрасываются
+    def __init__(self, hub, types: Optional[Iterable[str]], account: Optional[str],
+                 maxsize: int, overflow: str):
+        if overflow not in ("block", "drop_oldest"):
+            raise ValueError(f"Неизвестная политика переполнения: {overflow}")
+        self.hub = hub
+        self.types = set(types) if types else None
+        self.account = account
+        self.overflow = overflow
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self.closed = False
+        self._closed = asyncio.Event()
+
+    def matches(self, ev: Event) -> bool:
+        return (self.types is None or ev.type in self.types) and \
+            (self.account is None or ev.account == self.account)
+
+    async def put(self, ev: Event) -> None:
+        if self.closed:
+            return
+        if self.overflow == "block":
+            if not self.queue.full():
+                self.queue.put_nowait(ev)
+                return
+            # ждём места или close(): иначе закрытая подписка держит канал вечно
+            put = asyncio.ensure_future(self.queue.put(ev))
+            closed = asyncio.ensure_future(self._closed.wait())
+            try:
+                await asyncio.wait((put, closed), return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                closed.cancel()
+                if not put.done():
+                    put.cancel()
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(ev)
+
+    async def get(self) -> Optional[Event]:
+        # None — подписка закрыта
+        return await self.queue.get()
+
+    def __aiter__(self) -> AsyncIterator[Event]:
+        return self._iter()
+
+    async def _iter(self) -> AsyncIterator[Event]:
+        while (ev := await self.queue.get()) is not None:
+            yield ev
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._closed.set()
+        self.hub._subs.remove(self)
+        # освобождаем канал, если он ждал места в нашей очереди
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+@dataclass
+class ChannelState:
+    cursor: int = 0                 # id последнего полученного события
+    connected: bool = False
+    events: int = 0
+    reconnects: int = 0
+    last_error: str = ""
+
+
+class NotificationHub:
+    def __init__(
+        self,
+        clients: Dict[str, Any],    # login → BuffClient
+        *,
+        pool=None,                  # AccountPool: после перелогина берём новый BuffClient
+        timeout: float = POLL_TIMEOUT,
+        min_interval: float = MIN_INTERVAL,
+        since: Optional[Dict[str, int]] = None,     # стартовые курсоры, например из прошлого запуска
+        debug: bool = False,
+    ):
+        self.clients = clients
+        self.pool = pool
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.debug = debug
+        self.state: Dict[str, ChannelState] = {
+            login: ChannelState(cursor=(since or {}).get(login, 0)) for login in clients
+        }
+        self._subs: List[Subscription] = []
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_pool(cls, pool, **kw) -> "NotificationHub":
+        return cls({a.login: a.buff for a in pool.accounts}, pool=pool, **kw)
+
+    def subscribe(
+        self,
+        types: Optional[Iterable[str]] = None,
+        *,
+        account: Optional[str] = None,
+        maxsize: int = QUEUE_SIZE,
+        overflow: str = "block",
+    ) -> Subscription:
+        sub = Subscription(self, types, account, maxsize, overflow)
+        self._subs.append(sub)
+        return sub
+
+    # ── канал аккаунта ──────────────────────────────
+    async def _client(self, login: str):
+        if self.pool is None:
+            return self.clients[login]
+        acc = next(a for a in self.pool.accounts if a.login == login)
+        while not acc.ready:        # идёт перелогин — ждём свежую сессию
+            await asyncio.sleep(1.0)
+        return acc.buff
+
+    async def _publish(self, ev: Event) -> None:
+        for sub in list(self._subs):
+            if sub.matches(ev):
+                await sub.put(ev)
+
+    async def _channel(self, login: str) -> None:
+        st = self.state[login]
+        attempt = 0
+        while True:
+            buff = await self._client(login)
+            started = time.monotonic()
+            try:
+                data = await buff.api_poll(NOTIFY_PATH, timeout=self.timeout, since=st.cursor)
+            except Exception as e:
+                st.connected = False
+                st.reconnects += 1
+                st.last_error = f"{type(e).__name__}: {e}"
+                if self.debug:
+                    print(f"[NOTIFY] {login}: {st.last_error}, переподключение")
+                await asyncio.sleep(ratelimit.backoff(attempt))
+                attempt += 1
+                continue
+
+            code = data.get("code") if isinstance(data, dict) else None
+            if code != "OK":
+                st.connected = False
+                st.last_error = str(code or data)
+                if code == "Login Required" and self.pool is not None:
+                    self.pool.invalidate(buff)
+                if self.debug:
+                    print(f"[NOTIFY] {login}: {st.last_error}")
+                await asyncio.sleep(ratelimit.backoff(attempt))
+                attempt += 1
+                continue
+
+            attempt = 0
+            st.connected = True
+            body = data.get("data") or {}
+            items = body.get("items") or []
+            if not items:
+                # сервер может и не держать запрос (отвечает счётчиками сразу) —
+                # без паузы канал съест весь лимит аккаунта в ratelimit
+                await asyncio.sleep(max(0.0, self.min_interval - (time.monotonic() - started)))
+            for item in items:
+                eid = int(item.get("id") or 0)
+                if eid <= st.cursor:
+                    continue                # повтор после переподключения
+                ev = Event(login, eid, item.get("type", ""),
+                           {k: v for k, v in item.items() if k not in ("id", "type")})
+                st.cursor = eid
+                st.events += 1
+                # с overflow="block" здесь и возникает backpressure: следующий poll
+                # уйдёт только когда подписчики примут событие
+                await self._publish(ev)
+            st.cursor = max(st.cursor, int(body.get("cursor") or 0))
+
+    # ── public ──────────────────────────────────────
+    def start(self) -> None:
+        for login in self.clients:
+            task = self._tasks.get(login)
+            if task is None or task.done():
+                self._tasks[login] = asyncio.create_task(self._channel(login))
+
+    def cursors(self) -> Dict[str, int]:
+        # сохранить и передать в since= при следующем запуске
+        return {login: st.cursor for login, st in self.state.items()}
+
+    async def close(self) -> None:
+        tasks = list(self._tasks.values())
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        for sub in list(self._subs):
+            sub.close()
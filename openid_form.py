@@ -0,0 +1,86 @@
+import re
+from dataclasses import dataclass, field
+from html import unescape
+from typing import Dict, Optional
+
+STEAM = "https://steamcommunity.com"
+_STEAM_ID = re.compile(r'g_steamID\s*=\s*"(\d+)"')
+
+
+@dataclass
+class OpenIDForm:
+    action: str = ""
+    fields: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_openid(self) -> bool:
+        return "openid.mode" in self.fields
+
+    def url(self, base: str = STEAM) -> str:
+        return self.action if self.action.startswith("http") else base + self.action
+
+
+_TAG = re.compile(r"<(form|input)\b([^>]*)>", re.I)
+_ATTR = re.compile(r"""([\w.:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+# кнопки браузер без клика не отправляет
+_SKIP_TYPES = ("submit", "button", "image")
+
+
+def _attrs(raw: str) -> Dict[str, str]:
+    # атрибуты в любом порядке, одним проходом
+    return {m.group(1).lower(): unescape(m.group(2) or m.group(3) or m.group(4) or "")
+            for m in _ATTR.finditer(raw)}
+
+
+def _parse(html: str, start: int, end: int) -> OpenIDForm:
+    # html[start:end] — одна форма начиная с "<form"
+    form = None
+    for m in _TAG.finditer(html, start, end):
+        a = _attrs(m.group(2))
+        if form is None:
+            form = OpenIDForm(a.get("action", ""))
+        elif m.group(1).lower() == "input" and a.get("name") and a.get("type", "").lower() not in _SKIP_TYPES:
+            form.fields[a["name"]] = a.get("value", "")
+    return form or OpenIDForm()
+
+
+def _bounds(html: str, low: str, start: int):
+    end = low.find("</form", start)
+    return start, len(html) if end < 0 else end     # незакрытая форма в конце страницы тоже годится
+
+
+def _extract(html: str, low: str) -> Optional[OpenIDForm]:
+    pos = low.find("openid.mode")
+    while pos >= 0:
+        # openid.mode может встретиться и в скрипте до формы — тогда ищем дальше
+        start = low.rfind("<form", 0, pos)
+        if start >= 0:
+            start, end = _bounds(html, low, start)
+            if pos < end:
+                form = _parse(html, start, end)
+                if form.is_openid:
+                    return form
+        pos = low.find("openid.mode", pos + 1)
+    start = low.find("<form")
+    while start >= 0:
+        start, end = _bounds(html, low, start)
+        form = _parse(html, start, end)
+        if form.fields:
+            return form
+        start = low.find("<form", end)
+    return None
+
+
+def extract_form(html: str) -> Optional[OpenIDForm]:
+    # весь документ не разбираем: находим форму с openid.mode через str.find
+    # и разбираем только её; иначе — первая форма с полями.
+    # html.lower() стоит как весь поиск, поэтому сначала пробуем как есть (Steam пишет теги строчными)
+    form = _extract(html, html)
+    if (form is None or not form.is_openid) and ("<FORM" in html or "<Form" in html):
+        form = _extract(html, html.lower()) or form
+    return form
+
+
+def steam_id(html: str) -> Optional[str]:
+    m = _STEAM_ID.search(html)
+    return m.group(1) if m else None
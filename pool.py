@@ -0,0 +1,266 @@
+import asyncio, json, itertools
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from steam import SteamClient
+from buff import BuffClient
+from session_store import SessionStore, is_logged_in, login_cached
+from connectors import shared_connector
+from proxies import ProxyManager
+from cache import ResponseCache
+
+
+@dataclass
+class Account:
+    login: str
+    password: str
+    mafile: Path
+    port: Optional[int] = None
+    # ── состояние ───────────────────────────────────
+    steam: Optional[SteamClient] = field(default=None, repr=False)
+    buff: Optional[BuffClient] = field(default=None, repr=False)
+    ready: bool = False
+    inflight: int = 0
+    error: str = ""
+    logging_in: bool = False        # вход или refresh в процессе
+
+
+def load_accounts(
+    mafile_dir: str | Path,
+    credentials: str | Path,
+    ports: Sequence[int] = (),
+) -> List[Account]:
+    # credentials: {"login": "password"} или {"login": {"password": ..., "port": ...}}
+    creds = json.loads(Path(credentials).read_text("utf-8"))
+    mafiles = {}
+    for path in Path(mafile_dir).glob("*.maFile"):
+        name = json.loads(path.read_text("utf-8")).get("account_name")
+        if name:
+            mafiles[name] = path
+
+    accounts = []
+    port_cycle = itertools.cycle(ports) if ports else None
+    for login, info in creds.items():
+        if login not in mafiles:
+            print(f"[POOL] Нет maFile для {login}, пропускаем")
+            continue
+        if isinstance(info, str):
+            info = {"password": info}
+        port = info.get("port") or (next(port_cycle) if port_cycle else None)
+        accounts.append(Account(login, info["password"], mafiles[login], port))
+    return accounts
+
+
+class AccountPool:
+    def __init__(
+        self,
+        accounts: List[Account],
+        proxy_for: Callable[[int], str],
+        *,
+        concurrency: int = 4,
+        strategy: str = "least_loaded",  # или "round_robin"
+        refresh_interval: float = 300.0,
+        store: Optional[SessionStore] = None,
+        proxies: Optional[ProxyManager] = None,
+        cache: Optional[ResponseCache] = None,
+        debug: bool = False,
+    ):
+        if strategy not in ("least_loaded", "round_robin"):
+            raise ValueError(f"Неизвестная стратегия: {strategy}")
+        self.accounts = accounts
+        self.proxy_for = proxy_for
+        self.strategy = strategy
+        self.refresh_interval = refresh_interval
+        self.store = store
+        self.proxies = proxies
+        self.cache = cache if cache is not None else ResponseCache()
+        self.debug = debug
+        self._sem = asyncio.Semaphore(concurrency)
+        self._cond = asyncio.Condition()
+        self._rr = 0
+        self._refresher: Optional[asyncio.Task] = None
+        self._relogins: Dict[str, asyncio.Task] = {}
+        self._retired: List[SteamClient] = []   # заменённые refresh(), ждут закрытия
+
+    # ── авторизация ─────────────────────────────────
+    def _clients(self, acc: Account):
+        proxy = self.proxy_for(acc.port) if acc.port is not None else None
+        if self.proxies:
+            h = self.proxies.health.get(proxy)
+            if proxy is None or (h and h.quarantined):
+                proxy = self.proxies.best()
+        steam = SteamClient(
+            acc.login, acc.password, acc.mafile,
+            proxy=proxy, connector=shared_connector(proxy),
+            proxies=self.proxies, debug=self.debug,
+        )
+        return steam, BuffClient(steam, cache=self.cache, debug=self.debug)
+
+    @staticmethod
+    async def _settle(warm: asyncio.Task) -> None:
+        # вход закончился — недоделанный прогрев больше не нужен
+        warm.cancel()
+        await asyncio.gather(warm, return_exceptions=True)
+
+    @asynccontextmanager
+    async def _attempt(self, acc: Account):
+        # пока идёт вход, acquire() ждёт; после — будим, чтобы он проверил, есть ли ещё надежда
+        acc.logging_in = True
+        try:
+            yield
+        finally:
+            acc.logging_in = False
+            async with self._cond:
+                self._cond.notify_all()
+
+    async def _login(self, acc: Account) -> None:
+        async with self._attempt(acc):
+            if acc.steam:
+                await acc.steam.close()
+            acc.steam, acc.buff = self._clients(acc)
+            # TLS к Steam/Buff открывается, пока аккаунт ждёт своей очереди на вход
+            warm = asyncio.create_task(acc.steam.prewarm())
+            try:
+                async with self._sem:
+                    await login_cached(acc.steam, acc.buff, self.store)
+            except Exception as e:
+                acc.error = f"{type(e).__name__}: {e}"
+                if self.debug:
+                    print(f"[POOL] {acc.login}: вход не удался — {acc.error}")
+                return
+            finally:
+                await self._settle(warm)
+            acc.error = ""
+            async with self._cond:
+                acc.ready = True
+                self._cond.notify_all()
+
+    async def refresh(self, acc: Account, *, grace: float = 30.0) -> bool:
+        async with self._attempt(acc):
+            return await self._refresh(acc, grace)
+
+    async def _refresh(self, acc: Account, grace: float) -> bool:
+        # новый вход рядом со старой сессией; старая обслуживает запросы до подмены
+        # и закрывается через grace секунд, когда начатые на ней запросы доработают
+        steam, buff = self._clients(acc)
+        warm = asyncio.create_task(steam.prewarm())
+        try:
+            async with self._sem:
+                await steam.login()
+                await buff.login()
+        except BaseException as e:
+            await self._settle(warm)
+            await steam.close()
+            if not isinstance(e, Exception):
+                raise
+            acc.error = f"{type(e).__name__}: {e}"
+            if self.debug:
+                print(f"[POOL] {acc.login}: обновление сессии не удалось — {acc.error}")
+            return False
+        await self._settle(warm)
+        if self.store:
+            self.store.save(steam)
+        old, acc.steam, acc.buff = acc.steam, steam, buff
+        acc.error = ""
+        if old:
+            self._retired.append(old)
+            asyncio.get_running_loop().call_later(grace, lambda: asyncio.ensure_future(self._retire(old)))
+        async with self._cond:
+            acc.ready = True
+            self._cond.notify_all()
+        return True
+
+    async def _retire(self, steam: SteamClient) -> None:
+        if steam in self._retired:
+            self._retired.remove(steam)
+            await steam.close()
+
+    def _relogin(self, acc: Account) -> None:
+        acc.ready = False
+        acc.logging_in = True       # задача ещё не стартовала, но вход уже обещан
+        task = self._relogins.get(acc.login)
+        if task is None or task.done():
+            self._relogins[acc.login] = asyncio.create_task(self._login(acc))
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            for acc in self.accounts:
+                # занятые аккаунты не трогаем: запрос в полёте и так покажет, жива ли сессия
+                if acc.ready and not acc.inflight and not await is_logged_in(acc.buff):
+                    if self.debug:
+                        print(f"[POOL] {acc.login}: сессия истекла, перелогин в фоне")
+                    self._relogin(acc)
+                elif not acc.ready:
+                    self._relogin(acc)
+
+    # ── public ──────────────────────────────────────
+    async def start(self) -> None:
+        await asyncio.gather(*(self._login(a) for a in self.accounts))
+        if self.refresh_interval:   # 0 — сессиями управляет scheduler.SessionScheduler
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    def add(self, acc: Account) -> None:
+        # аккаунт на ходу (например, от упавшего шарда); вход идёт в фоне
+        self.accounts.append(acc)
+        self._relogin(acc)
+
+    def ready(self) -> List[Account]:
+        return [a for a in self.accounts if a.ready]
+
+    def _pick(self) -> Optional[Account]:
+        ready = self.ready()
+        if not ready:
+            return None
+        if self.strategy == "round_robin":
+            self._rr = (self._rr + 1) % len(ready)
+            return ready[self._rr]
+        return min(ready, key=lambda a: a.inflight)
+
+    def _hopeless(self) -> bool:
+        # ни одного готового, ни одного входа в процессе, у каждого записана ошибка
+        return bool(self.accounts) and all(
+            not a.ready and not a.logging_in and a.error for a in self.accounts
+        )
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.ready() or self._hopeless())
+            if not self.ready():
+                raise RuntimeError("Нет рабочих аккаунтов: " +
+                                   "; ".join(f"{a.login}: {a.error}" for a in self.accounts))
+            acc = self._pick()
+            acc.inflight += 1
+        try:
+            yield acc.buff
+        finally:
+            acc.inflight -= 1
+
+    def invalidate(self, buff: BuffClient) -> None:
+        # вызывающий получил "Login Required" — уводим аккаунт на перелогин
+        for acc in self.accounts:
+            if acc.buff is buff:
+                self._relogin(acc)
+                return
+
+    async def api_get(self, path: str, **params):
+        async with self.acquire() as buff:
+            data = await buff.api_get(path, **params)
+        if isinstance(data, dict) and data.get("code") == "Login Required":
+            self.invalidate(buff)
+        return data
+
+    async def close(self) -> None:
+        tasks = [t for t in (self._refresher, *self._relogins.values()) if t]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for acc in self.accounts:
+            acc.ready = False
+            if acc.steam:
+                await acc.steam.close()
+        for steam in list(self._retired):
+            await self._retire(steam)
@@ -0,0 +1,149 @@
+import asyncio, time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from steam import SteamClient
+from buff import BuffClient
+from session_store import SessionStore, is_logged_in
+
+STAGES = ("steam", "buff", "api")
+DEFAULT_TIMEOUTS = {"steam": 30.0, "buff": 30.0, "api": 15.0}
+
+
+@dataclass
+class ProbeResult:
+    port: int
+    ok: bool = False
+    stage: str = ""                      # стадия, на которой остановились
+    error: str = ""
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total(self) -> float:
+        return sum(self.timings.values())
+
+
+async def _timed(res: ProbeResult, stage: str, coro, timeout: float):
+    res.stage = stage
+    t0 = time.perf_counter()
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    finally:
+        res.timings[stage] = res.timings.get(stage, 0.0) + time.perf_counter() - t0
+
+
+async def probe_port(
+    port: int,
+    proxy: str,
+    login: str,
+    pwd: str,
+    mafile: str,
+    *,
+    timeouts: Optional[Dict[str, float]] = None,
+    res: Optional[ProbeResult] = None,
+    store: Optional[SessionStore] = None,
+    debug: bool = False,
+) -> ProbeResult:
+    timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+    res = res or ProbeResult(port)
+
+    steam = SteamClient(login, pwd, mafile, proxy=proxy, debug=debug)
+    try:
+        buff = BuffClient(steam, debug=debug)
+        warm = False
+        if store and store.restore(steam):
+            warm = await _timed(res, "buff", is_logged_in(buff), timeouts["buff"])
+            if not warm:
+                store.drop(steam)
+                steam.sess.cookie_jar.clear()
+        if not warm:
+            await _timed(res, "steam", steam.login(), timeouts["steam"])
+            await _timed(res, "buff", buff.login(), timeouts["buff"])
+            if store:
+                store.save(steam)
+        data = await _timed(
+            res, "api",
+            buff.api_get("/api/market/goods", game="csgo", page_num=1, page_size=1),
+            timeouts["api"],
+        )
+        if data.get("code") == "OK":
+            res.ok, res.stage = True, ""
+        else:
+            res.error = f"API вернул: {data.get('code', 'Unknown')}"
+    except asyncio.TimeoutError:
+        res.error = "timeout"
+    except asyncio.CancelledError:
+        res.error = "cancelled"
+        raise
+    except Exception as e:
+        res.error = f"{type(e).__name__}: {e}"
+    finally:
+        await steam.close()
+    return res
+
+
+async def probe_ports(
+    ports: Iterable[int],
+    proxy_for: Callable[[int], str],
+    login: str,
+    pwd: str,
+    mafile: str,
+    *,
+    concurrency: int = 8,
+    winners: Optional[int] = None,       # сколько рабочих портов достаточно
+    timeouts: Optional[Dict[str, float]] = None,
+    store: Optional[SessionStore] = None,
+    debug: bool = False,
+) -> List[ProbeResult]:
+    sem = asyncio.Semaphore(concurrency)
+    results = {p: ProbeResult(p) for p in ports}
+
+    async def run(res: ProbeResult) -> ProbeResult:
+        async with sem:
+            return await probe_port(
+                res.port, proxy_for(res.port), login, pwd, mafile,
+                timeouts=timeouts, res=res, store=store, debug=debug,
+            )
+
+    tasks = [asyncio.create_task(run(r)) for r in results.values()]
+    found = 0
+    try:
+        for fut in asyncio.as_completed(tasks):
+            res = await fut
+            if debug:
+                print(f"[PROBE] порт {res.port}: {'OK' if res.ok else res.error} ({res.total:.2f}s)")
+            if res.ok:
+                found += 1
+                if winners and found >= winners:
+                    break
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    for res in results.values():
+        if not res.ok and not res.error:
+            res.error = "cancelled" if res.timings else "skipped"
+
+    return rank(results.values())
+
+
+def rank(results: Iterable[ProbeResult]) -> List[ProbeResult]:
+    # рабочие — по суммарной латентности, остальные — по тому, как далеко прошли
+    return sorted(
+        results,
+        key=lambda r: (not r.ok, -len(r.timings) if not r.ok else 0, r.total),
+    )
+
+
+def format_table(results: Iterable[ProbeResult]) -> str:
+    head = f"{'port':>6} {'ok':>3} " + " ".join(f"{s:>8}" for s in STAGES) + f" {'total':>8}  error"
+    lines = [head, "-" * len(head)]
+    for r in results:
+        cells = " ".join(
+            f"{r.timings[s]:8.2f}" if s in r.timings else f"{'-':>8}" for s in STAGES
+        )
+        lines.append(
+            f"{r.port:>6} {'+' if r.ok else '-':>3} {cells} {r.total:8.2f}  {r.error}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,109 @@
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterable, List, Optional
+
+ALPHA = 0.2             # вес нового наблюдения в EWMA
+FAIL_THRESHOLD = 3      # подряд ошибок до карантина
+COOLDOWN = 10.0         # первый карантин, секунд; дальше удваивается
+MAX_COOLDOWN = 600.0
+
+
+@dataclass
+class ProxyHealth:
+    url: str
+    success: float = 1.0            # EWMA доли успешных запросов
+    latency: float = 1.0            # EWMA задержки, секунд
+    fails: int = 0                  # ошибок подряд
+    strikes: int = 0                # сколько раз уходил в карантин
+    last_error: str = ""
+    cooldown_until: float = 0.0
+
+    @property
+    def quarantined(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    @property
+    def score(self) -> float:
+        return self.success / (self.latency + 0.1)
+
+
+class ProxyManager:
+    def __init__(self, proxies: Iterable[str], *, debug: bool = False):
+        self.health: Dict[str, ProxyHealth] = {p: ProxyHealth(p) for p in proxies}
+        self.debug = debug
+
+    @classmethod
+    def from_probe(cls, results, proxy_for: Callable[[int], str], **kw) -> "ProxyManager":
+        # стартовые оценки из prober.probe_ports: рабочие порты с их латентностью
+        mgr = cls([proxy_for(r.port) for r in results if r.ok], **kw)
+        for r in results:
+            if r.ok:
+                mgr.health[proxy_for(r.port)].latency = r.timings.get("api", r.total)
+        return mgr
+
+    def add(self, url: str) -> None:
+        self.health.setdefault(url, ProxyHealth(url))
+
+    # ── наблюдения ──────────────────────────────────
+    def record(self, url: Optional[str], ok: bool, latency: Optional[float] = None, error: str = "") -> None:
+        h = self.health.get(url or "")
+        if h is None:
+            return
+        h.success += ALPHA * ((1.0 if ok else 0.0) - h.success)
+        if latency is not None:
+            h.latency += ALPHA * (latency - h.latency)
+        if ok:
+            h.fails = 0
+            if h.success > 0.95:        # полностью восстановился — забываем прошлые карантины
+                h.strikes = 0
+            return
+        h.fails += 1
+        h.last_error = error
+        if h.fails >= FAIL_THRESHOLD:
+            h.strikes += 1
+            h.fails = 0
+            cool = min(MAX_COOLDOWN, COOLDOWN * 2 ** (h.strikes - 1))
+            h.cooldown_until = time.monotonic() + cool
+            if self.debug:
+                print(f"[PROXY] {url}: карантин на {cool:.0f}s ({error})")
+
+    def trace_config(self, current: Callable[[], Optional[str]]):
+        # current() — прокси, через который сейчас ходит сессия
+        import aiohttp
+        from ratelimit import THROTTLE_STATUS
+
+        async def on_start(session, ctx: SimpleNamespace, params) -> None:
+            ctx.proxy_t0 = time.perf_counter()
+            ctx.proxy_url = current()
+
+        async def on_end(session, ctx: SimpleNamespace, params) -> None:
+            status = params.response.status
+            if status in THROTTLE_STATUS:
+                return                  # троттлинг сайта — забота ratelimit, прокси тут ни при чём
+            # 5xx и 407 — это прокси или перегрузка, 4xx от сайта прокси не портят
+            ok = status < 500 and status != 407
+            self.record(ctx.proxy_url, ok, time.perf_counter() - ctx.proxy_t0, "" if ok else f"HTTP {status}")
+
+        async def on_exc(session, ctx: SimpleNamespace, params) -> None:
+            e = params.exception
+            self.record(getattr(ctx, "proxy_url", None), False, None, f"{type(e).__name__}: {e}")
+
+        tc = aiohttp.TraceConfig()
+        tc.on_request_start.append(on_start)
+        tc.on_request_end.append(on_end)
+        tc.on_request_exception.append(on_exc)
+        return tc
+
+    # ── выбор ───────────────────────────────────────
+    def ranked(self) -> List[ProxyHealth]:
+        return sorted(self.health.values(), key=lambda h: (h.quarantined, -h.score))
+
+    def best(self, exclude: Iterable[Optional[str]] = ()) -> Optional[str]:
+        exclude = set(exclude)
+        live = [h for h in self.health.values() if not h.quarantined and h.url not in exclude]
+        if live:
+            return max(live, key=lambda h: h.score).url
+        # всё в карантине — берём того, кто выйдет раньше
+        rest = [h for h in self.health.values() if h.url not in exclude]
+        return min(rest, key=lambda h: h.cooldown_until).url if rest else None
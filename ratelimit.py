@@ -0,0 +1,165 @@
+import asyncio, random, time
+from types import SimpleNamespace
+from typing import Callable, Dict, Optional
+
+import aiohttp
+from yarl import URL
+
+# ── бюджеты по умолчанию (запросов в секунду) ───
+# Steam и Buff считают запросы по IP, поэтому лимит хоста свой у каждого выхода
+# (прокси или прямое соединение), а не один на процесс
+HOST_RATES = {
+    "steamcommunity.com": 5.0,
+    "store.steampowered.com": 5.0,
+    "buff.163.com": 8.0,
+}
+DEFAULT_HOST_RATE = 10.0
+HOST_BURST = 8.0          # запас хоста на цепочку входа (к steamcommunity.com — 6 запросов подряд)
+ACCOUNT_RATE = 4.0
+
+THROTTLE_STATUS = {429, 503}
+# этапы входа в Buff (trace_request_ctx["stage"]): цепочка разовая и короткая,
+# её держит только лимит хоста, иначе вход упирается в лимит аккаунта
+LOGIN_STAGES = {"buff.redirect", "buff.openid_post", "buff.openid_form",
+                "buff.callback", "buff.form_resubmit", "buff.home"}
+# операции записи (покупка, выставление): бюджет хоста заранее не тратят,
+# ждут только паузы после 429/503 — задержка снайпа важнее равномерности
+WRITE_STAGES = {"buff.api_post"}
+# коды, которыми Buff отвечает на слишком частые запросы
+BUFF_THROTTLE_CODES = {"Frequency Limited", "Too Frequently", "System Busy", "Too Many Requests"}
+
+
+class TokenBucket:
+    # AIMD: при троттлинге скорость делится пополам, при успехах плавно растёт обратно
+    def __init__(self, rate: float, burst: Optional[float] = None, *, min_rate: Optional[float] = None):
+        self.base_rate = self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def pause(self) -> None:
+        # только пауза, объявленная сервером; токены не тратятся
+        while (left := self.blocked_until - time.monotonic()) > 0:
+            await asyncio.sleep(left)
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+        pause = retry_after if retry_after is not None else 1.0 / self.rate
+        self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+
+    def reward(self) -> None:
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 20)
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        host_rates: Optional[Dict[str, float]] = None,
+        *,
+        default_rate: float = DEFAULT_HOST_RATE,
+        account_rate: Optional[float] = ACCOUNT_RATE,
+    ):
+        self.host_rates = {**HOST_RATES, **(host_rates or {})}
+        self.default_rate = default_rate
+        self.account_rate = account_rate
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def _host_bucket(self, host: str, egress: Optional[str] = None) -> TokenBucket:
+        key = f"host:{egress or ''}|{host}"
+        if key not in self._buckets:
+            rate = self.host_rates.get(host, self.default_rate)
+            self._buckets[key] = TokenBucket(rate, max(rate, HOST_BURST))
+        return self._buckets[key]
+
+    def _account_bucket(self, account: Optional[str]) -> Optional[TokenBucket]:
+        if not account or not self.account_rate:
+            return None
+        key = "acc:" + account
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(self.account_rate)
+        return self._buckets[key]
+
+    async def acquire(self, host: str, account: Optional[str] = None,
+                      egress: Optional[str] = None, *, write: bool = False) -> None:
+        acc = self._account_bucket(account)
+        if acc:
+            await acc.acquire()
+        bucket = self._host_bucket(host, egress)
+        await (bucket.pause() if write else bucket.acquire())
+
+    def feedback(self, host: str, account: Optional[str], throttled: bool,
+                 retry_after: Optional[float] = None, egress: Optional[str] = None) -> None:
+        for b in (self._host_bucket(host, egress), self._account_bucket(account)):
+            if b is None:
+                continue
+            if throttled:
+                b.penalize(retry_after)
+            else:
+                b.reward()
+
+    def trace_config(self, account: Optional[str] = None,
+                     egress: Optional[Callable[[], Optional[str]]] = None) -> aiohttp.TraceConfig:
+        # egress() — прокси, через который сейчас ходит сессия (None — напрямую).
+        # Лимит хоста — на все запросы сессии, включая OpenID-редиректы.
+        # Лимит аккаунта — только на чтение: POST записи, вход и редиректы его не тратят
+        async def on_start(session, ctx: SimpleNamespace, params) -> None:
+            req = ctx.trace_request_ctx
+            stage = req.get("stage") if isinstance(req, dict) else None
+            ctx.account = account if params.method == "GET" and stage not in LOGIN_STAGES else None
+            ctx.egress = egress() if egress else None
+            await self.acquire(params.url.host or "", ctx.account, ctx.egress, write=stage in WRITE_STAGES)
+
+        async def on_end(session, ctx: SimpleNamespace, params) -> None:
+            resp = params.response
+            throttled = resp.status in THROTTLE_STATUS
+            self.feedback(params.url.host or "", ctx.account, throttled,
+                          retry_after(resp) if throttled else None, ctx.egress)
+
+        async def on_redirect(session, ctx: SimpleNamespace, params) -> None:
+            await on_end(session, ctx, params)
+            ctx.account = None
+            nxt = params.url.join(URL(params.response.headers.get("Location", "")))
+            await self.acquire(nxt.host or params.url.host, None, ctx.egress)
+
+        tc = aiohttp.TraceConfig()
+        tc.on_request_start.append(on_start)
+        tc.on_request_redirect.append(on_redirect)
+        tc.on_request_end.append(on_end)
+        return tc
+
+
+def retry_after(resp) -> Optional[float]:
+    try:
+        return float(resp.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def backoff(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    # full jitter
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+DEFAULT = RateLimiter()
@@ -0,0 +1,173 @@
+import asyncio, random, time, zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from session_store import session_alive
+
+LIFETIME = 6 * 3600.0     # стартовая оценка жизни сессии Buff, секунд
+AHEAD = 0.25              # обновляем, когда осталось меньше этой доли жизни
+STAGGER = 0.15            # разброс момента обновления между аккаунтами, доля жизни
+PROBE_EVERY = 600.0       # средний интервал дешёвой проверки user/info
+MIN_LIFETIME = 600.0
+RETRY = 30.0              # первая пауза после неудачного обновления; дальше удваивается
+MAX_RETRY = 900.0
+
+
+@dataclass
+class SessionInfo:
+    login: str
+    started: float = 0.0            # unix-время входа (SteamClient.session_started)
+    next_probe: float = 0.0         # monotonic
+    retry_at: float = 0.0           # monotonic; после неудачи не раньше
+    fails: int = 0
+    refreshes: int = 0
+    expired: int = 0                # сколько раз застали сессию мёртвой
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.started if self.started else 0.0
+
+
+# держит сессии пула горячими: проверяет их в фоне и перелогинивает
+# заранее, до истечения, разнося аккаунты по времени
+class SessionScheduler:
+    def __init__(
+        self,
+        pool,
+        *,
+        lifetime: float = LIFETIME,
+        ahead: float = AHEAD,
+        stagger: float = STAGGER,
+        probe_every: float = PROBE_EVERY,
+        max_parallel: int = 2,
+        tick: float = 5.0,
+        debug: bool = False,
+    ):
+        # пул лучше создавать с refresh_interval=0, чтобы не было второго цикла проверок
+        self.pool = pool
+        self.lifetime = lifetime
+        self.ahead = ahead
+        self.stagger = stagger
+        self.probe_every = probe_every
+        self.tick = tick
+        self.debug = debug
+        self.info: Dict[str, SessionInfo] = {}
+        self._sem = asyncio.Semaphore(max_parallel)
+        self._busy: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    # ── оценки ──────────────────────────────────────
+    def _info(self, acc) -> SessionInfo:
+        info = self.info.get(acc.login)
+        if info is None:
+            info = self.info[acc.login] = SessionInfo(acc.login)
+            # первые проверки тоже размазываем по интервалу
+            info.next_probe = time.monotonic() + random.uniform(0, self.probe_every)
+        if acc.steam is not None:
+            info.started = acc.steam.session_started
+        return info
+
+    def _offset(self, login: str) -> float:
+        # постоянный для аккаунта сдвиг: соседи не обновляются одновременно
+        return (zlib.crc32(login.encode()) % 1000) / 1000 * self.stagger * self.lifetime
+
+    def expires_at(self, acc) -> float:
+        return self._info(acc).started + self.lifetime
+
+    def refresh_at(self, acc) -> float:
+        return self.expires_at(acc) - self.ahead * self.lifetime - self._offset(acc.login)
+
+    def _learn(self, info: SessionInfo) -> None:
+        # сессия умерла раньше оценки — сдвигаем оценку к наблюдённому возрасту
+        age = info.age
+        if 0 < age < self.lifetime:
+            self.lifetime = max(MIN_LIFETIME, self.lifetime + 0.5 * (age - self.lifetime))
+            if self.debug:
+                print(f"[SCHED] оценка жизни сессии → {self.lifetime / 60:.1f} мин")
+
+    # ── действия ────────────────────────────────────
+    async def _refresh(self, acc, reason: str) -> None:
+        info = self._info(acc)
+        async with self._sem:
+            if self.debug:
+                print(f"[SCHED] {acc.login}: обновление ({reason}, возраст {info.age / 60:.1f} мин)")
+            ok = await self.pool.refresh(acc)
+        if ok:
+            info.fails = 0
+            info.refreshes += 1
+            info.started = acc.steam.session_started
+            info.next_probe = time.monotonic() + self.probe_every * random.uniform(0.5, 1.5)
+        else:
+            info.fails += 1
+            info.retry_at = time.monotonic() + min(MAX_RETRY, RETRY * 2 ** (info.fails - 1))
+
+    async def _probe(self, acc) -> None:
+        info = self._info(acc)
+        info.next_probe = time.monotonic() + self.probe_every * random.uniform(0.5, 1.5)
+        alive = await session_alive(acc.buff)
+        if alive is None:
+            # сетевая ошибка — не повод перелогиниваться и учить оценку
+            if self.debug:
+                print(f"[SCHED] {acc.login}: проверка не прошла, повтор позже")
+            return
+        if alive:
+            return
+        # мёртвую сессию сразу убираем из выдачи, пока идёт вход
+        acc.ready = False
+        info.expired += 1
+        self._learn(info)
+        await self._refresh(acc, "истекла")
+
+    def _spawn(self, acc, coro) -> None:
+        task = self._busy[acc.login] = asyncio.create_task(coro)
+        task.add_done_callback(lambda _: self._busy.pop(acc.login, None))
+
+    def step(self) -> None:
+        now, wall = time.monotonic(), time.time()
+        for acc in self.pool.accounts:
+            relogin = self.pool._relogins.get(acc.login)
+            if acc.login in self._busy or acc.steam is None or (relogin and not relogin.done()):
+                continue
+            info = self._info(acc)
+            if now < info.retry_at:
+                continue
+            if not acc.ready:
+                self._spawn(acc, self._refresh(acc, "не готов"))
+            elif wall >= self.refresh_at(acc):
+                self._spawn(acc, self._refresh(acc, "скоро истечёт"))
+            elif now >= info.next_probe and not acc.inflight:
+                # занятые не проверяем: запрос в полёте и так покажет, жива ли сессия
+                self._spawn(acc, self._probe(acc))
+
+    async def _loop(self) -> None:
+        while True:
+            self.step()
+            await asyncio.sleep(self.tick)
+
+    # ── public ──────────────────────────────────────
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    def hot(self) -> List:
+        # готовые аккаунты, которым до планового обновления ещё далеко
+        wall = time.time()
+        return [a for a in self.pool.ready() if wall < self.refresh_at(a)]
+
+    def status(self) -> List[Dict]:
+        wall = time.time()
+        return [{
+            "login": a.login,
+            "ready": a.ready,
+            "age": round(self._info(a).age),
+            "refresh_in": round(self.refresh_at(a) - wall),
+            "refreshes": self._info(a).refreshes,
+            "expired": self._info(a).expired,
+            "fails": self._info(a).fails,
+        } for a in self.pool.accounts]
+
+    async def close(self) -> None:
+        tasks = [t for t in (self._task, *self._busy.values()) if t]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
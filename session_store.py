@@ -0,0 +1,89 @@
+import hashlib, json, time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from cookies import dump as dump_cookies, load as load_cookies
+
+CHECK_PATH = "/account/api/user/info"   # дешёвый запрос, требующий авторизации
+DEFAULT_TTL = 12 * 3600
+
+
+# Кэш cookies на диске: один файл на пару (аккаунт, прокси)
+class SessionStore:
+    def __init__(self, root: str | Path = ".sessions", *, ttl: float = DEFAULT_TTL):
+        self.root = Path(root)
+        self.ttl = ttl
+
+    def _path(self, account: str, proxy: Optional[str]) -> Path:
+        key = hashlib.sha1(f"{account}|{proxy or ''}".encode()).hexdigest()[:16]
+        return self.root / f"{account}.{key}.json"
+
+    # ── сериализация CookieJar ──────────────────────
+    @staticmethod
+    def dump_jar(jar) -> List[Dict[str, str]]:
+        return dump_cookies(jar)
+
+    @staticmethod
+    def load_jar(jar, rows: List[Dict[str, str]]) -> None:
+        load_cookies(jar, rows)
+
+    # ── public ──────────────────────────────────────
+    def save(self, steam) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(steam.username, steam.proxy_url)
+        payload = {"saved_at": time.time(), "cookies": self.dump_jar(steam.sess.cookie_jar)}
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload), "utf-8")
+        tmp.replace(path)
+
+    def restore(self, steam) -> bool:
+        path = self._path(steam.username, steam.proxy_url)
+        try:
+            payload = json.loads(path.read_text("utf-8"))
+        except (OSError, ValueError):
+            return False
+        if time.time() - payload.get("saved_at", 0) > self.ttl:
+            path.unlink(missing_ok=True)
+            return False
+        self.load_jar(steam.sess.cookie_jar, payload.get("cookies", []))
+        steam.session_started = payload.get("saved_at", 0)
+        return True
+
+    def drop(self, steam) -> None:
+        self._path(steam.username, steam.proxy_url).unlink(missing_ok=True)
+
+
+async def session_alive(buff) -> Optional[bool]:
+    # мимо кэша ответов: проверка должна видеть сессию как есть сейчас.
+    # None — ответа Buff нет (сеть, прокси, 5xx), о сессии ничего не известно
+    try:
+        data, _ = await buff._api_get(CHECK_PATH)
+    except Exception:
+        return None
+    code = data.get("code") if isinstance(data, dict) else None
+    if code == "OK":
+        return True
+    if code == "Login Required":
+        return False
+    return None
+
+
+async def is_logged_in(buff) -> bool:
+    return await session_alive(buff) is True
+
+
+async def login_cached(steam, buff, store: Optional[SessionStore]) -> Dict[str, str]:
+    # тёплый старт: восстановили cookies и один запрос к Buff
+    if store and store.restore(steam):
+        if await is_logged_in(buff):
+            if buff.debug:
+                print("[SESSION] Сессия восстановлена из кэша")
+            return buff._get_cookies()
+        store.drop(steam)
+        steam.sess.cookie_jar.clear()
+
+    await steam.login()
+    cookies = await buff.login()
+    if store:
+        store.save(steam)
+    return cookies
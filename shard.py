@@ -0,0 +1,285 @@
+import asyncio, os, queue, time
+import multiprocessing as mp
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metrics import Metrics, DEFAULT as METRICS
+
+# Аккаунты делятся между процессами; у каждого свой event loop, коннекторы и AccountPool.
+# RSA, разбор HTML и JSON перестают упираться в одно ядро.
+#
+# proxy_for и job передаются в дочерние процессы по имени (spawn), поэтому это должны
+# быть функции верхнего уровня модуля, а запускающий скрипт — с if __name__ == "__main__".
+
+REPORT_EVERY = 1.0          # как часто шард шлёт отчёт, секунд
+MAX_SAMPLES = 20000         # метрик в одном отчёте, лишние отбрасываются
+
+Creds = Tuple[str, str, str, Optional[int]]     # login, password, mafile, port
+Job = Callable[[Any, int], Awaitable[Any]]      # job(pool, shard_id)
+
+
+class _ReportSink:
+    # копит замеры между отчётами; координатор переигрывает их в свои приёмники
+    def __init__(self, maxlen: int = MAX_SAMPLES):
+        self.buf: deque = deque(maxlen=maxlen)
+
+    def record(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        self.buf.append((name, value, labels))
+
+    def drain(self) -> List[tuple]:
+        out = list(self.buf)
+        self.buf.clear()
+        return out
+
+
+def _split(creds: List[Creds], n: int) -> List[List[Creds]]:
+    # аккаунты одного прокси — в один шард: лимиты хоста в ratelimit считаются по
+    # выходному IP внутри процесса, и прокси, разнесённый по n шардам, получил бы n бюджетов.
+    # Аккаунты без порта расходятся поштучно
+    groups: Dict[Any, List[Creds]] = defaultdict(list)
+    for i, c in enumerate(creds):
+        groups[c[3] if c[3] is not None else ("direct", i)].append(c)
+    parts: List[List[Creds]] = [[] for _ in range(n)]
+    for g in sorted(groups.values(), key=len, reverse=True):
+        min(parts, key=len).extend(g)
+    return parts
+
+
+# ── дочерний процесс ────────────────────────────
+def _report(shard: int, pool, sink: _ReportSink) -> Dict:
+    return {
+        "shard": shard,
+        "pid": os.getpid(),
+        "accounts": [
+            {"login": a.login, "ready": a.ready, "inflight": a.inflight, "error": a.error}
+            for a in pool.accounts
+        ],
+        "samples": sink.drain(),
+    }
+
+
+async def _shard_main(shard, creds, proxy_for, job, pool_kw, inbox, outbox, report_every, debug) -> None:
+    from pool import Account, AccountPool
+    from connectors import close_shared
+
+    sink = _ReportSink()
+    METRICS.add_sink(sink)
+    pool = AccountPool([Account(*c) for c in creds], proxy_for, debug=debug, **pool_kw)
+    task = None
+    try:
+        await pool.start()
+        task = asyncio.create_task(job(pool, shard)) if job else None
+        while True:
+            if task:
+                await asyncio.wait({task}, timeout=report_every)
+            else:
+                await asyncio.sleep(report_every)
+            stop = False
+            while True:
+                try:
+                    cmd, arg = inbox.get_nowait()
+                except queue.Empty:
+                    break
+                if cmd == "add":
+                    for c in arg:
+                        pool.add(Account(*c))
+                elif cmd == "stop":
+                    stop = True
+            outbox.put(("report", _report(shard, pool, sink)))
+            if task and task.done():
+                err = task.exception()
+                outbox.put(("done", shard, None if err else task.result(),
+                            f"{type(err).__name__}: {err}" if err else ""))
+                return
+            if stop:
+                outbox.put(("done", shard, None, "остановлен"))
+                return
+    except Exception as e:
+        outbox.put(("done", shard, None, f"{type(e).__name__}: {e}"))
+    finally:
+        if task and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await pool.close()
+        await close_shared()
+
+
+def _shard_entry(*args) -> None:
+    asyncio.run(_shard_main(*args))
+
+
+# ── координатор ─────────────────────────────────
+@dataclass
+class Shard:
+    id: int
+    creds: List[Creds]
+    process: Any = None
+    inbox: Any = None
+    pid: int = 0
+    done: bool = False
+    result: Any = None
+    error: str = ""
+    last_report: float = 0.0
+
+
+@dataclass
+class ShardStats:
+    reports: int = 0
+    samples: int = 0
+    deaths: int = 0
+    rebalanced: int = 0             # аккаунтов передано от упавших шардов
+    started_at: float = field(default_factory=time.monotonic)
+
+
+class ShardedRunner:
+    def __init__(
+        self,
+        accounts,                   # pool.Account или кортежи (login, password, mafile, port)
+        proxy_for: Callable[[int], str],
+        job: Optional[Job] = None,
+        *,
+        workers: Optional[int] = None,
+        pool_kw: Optional[Dict] = None,
+        report_every: float = REPORT_EVERY,
+        metrics: Optional[Metrics] = None,
+        debug: bool = False,
+    ):
+        self.creds: List[Creds] = [
+            a if isinstance(a, tuple) else (a.login, a.password, str(a.mafile), a.port)
+            for a in accounts
+        ]
+        self.proxy_for = proxy_for
+        self.job = job
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(self.creds) or 1))
+        self.pool_kw = pool_kw or {}
+        self.report_every = report_every
+        self.metrics = metrics or METRICS
+        self.debug = debug
+        self.shards: Dict[int, Shard] = {}
+        self.health: Dict[str, Dict] = {}       # login → последнее состояние + shard
+        self.stats = ShardStats()
+        self._ctx = mp.get_context("spawn")
+        self._outbox = self._ctx.Queue()
+        self._next_id = 0
+
+    # ── процессы ────────────────────────────────────
+    def _spawn(self, creds: List[Creds]) -> Shard:
+        sh = Shard(self._next_id, list(creds))
+        self._next_id += 1
+        sh.inbox = self._ctx.Queue()
+        sh.process = self._ctx.Process(
+            target=_shard_entry,
+            args=(sh.id, sh.creds, self.proxy_for, self.job, self.pool_kw,
+                  sh.inbox, self._outbox, self.report_every, self.debug),
+            name=f"shard-{sh.id}",
+            daemon=True,
+        )
+        sh.process.start()
+        sh.pid = sh.process.pid
+        self.shards[sh.id] = sh
+        if self.debug:
+            print(f"[SHARD] {sh.id}: pid {sh.pid}, аккаунтов {len(creds)}")
+        return sh
+
+    def live(self) -> List[Shard]:
+        return [s for s in self.shards.values() if not s.done and s.process.is_alive()]
+
+    def _rebalance(self, dead: Shard) -> None:
+        # аккаунты упавшего шарда — живым по кругу; живых нет — новый процесс
+        dead.done = True
+        dead.error = dead.error or f"процесс завершился с кодом {dead.process.exitcode}"
+        self.stats.deaths += 1
+        self.stats.rebalanced += len(dead.creds)
+        for c in dead.creds:
+            self.health.pop(c[0], None)
+        live = self.live()
+        if self.debug:
+            print(f"[SHARD] {dead.id} упал ({dead.error}), {len(dead.creds)} аккаунтов → "
+                  f"{'шарды ' + ', '.join(str(s.id) for s in live) if live else 'новый шард'}")
+        if not live:
+            self._spawn(dead.creds)
+            return
+        for s, part in zip(live, _split(dead.creds, len(live))):
+            if part:
+                s.creds.extend(part)
+                s.inbox.put(("add", part))
+
+    # ── сообщения ───────────────────────────────────
+    def _handle(self, msg) -> None:
+        kind = msg[0]
+        if kind == "report":
+            r = msg[1]
+            sh = self.shards.get(r["shard"])
+            if sh is None or sh.done:
+                return
+            sh.last_report = time.monotonic()
+            self.stats.reports += 1
+            self.stats.samples += len(r["samples"])
+            for name, value, labels in r["samples"]:
+                self.metrics.record(name, value, shard=str(sh.id), **labels)
+            for a in r["accounts"]:
+                self.health[a["login"]] = {**a, "shard": sh.id}
+        elif kind == "done":
+            _, sid, result, error = msg
+            sh = self.shards[sid]
+            sh.done, sh.result, sh.error = True, result, error
+            if self.debug:
+                print(f"[SHARD] {sid}: завершён{' — ' + error if error else ''}")
+
+    def _get(self, timeout: float):
+        try:
+            return self._outbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    # ── public ──────────────────────────────────────
+    async def run(self) -> Dict[int, Any]:
+        # результаты job по шардам; упавшие шарды в результат не попадают
+        for part in _split(self.creds, self.workers):
+            if part:
+                self._spawn(part)
+        loop = asyncio.get_running_loop()
+        try:
+            while not all(s.done for s in self.shards.values()):
+                msg = await loop.run_in_executor(None, self._get, self.report_every)
+                while msg is not None:
+                    self._handle(msg)
+                    msg = self._get(0)
+                for sh in list(self.shards.values()):
+                    if not sh.done and not sh.process.is_alive():
+                        # «done» мог прийти прямо перед выходом — дочитываем очередь
+                        while (msg := self._get(0.05)) is not None:
+                            self._handle(msg)
+                        if not sh.done:
+                            self._rebalance(sh)
+        finally:
+            self.stop()
+            for sh in self.shards.values():
+                await loop.run_in_executor(None, sh.process.join, 5)
+                if sh.process.is_alive():
+                    sh.process.terminate()
+        return {s.id: s.result for s in self.shards.values() if not s.error}
+
+    def stop(self) -> None:
+        for sh in self.shards.values():
+            if not sh.done and sh.process.is_alive():
+                sh.inbox.put(("stop", None))
+
+    def kill(self, shard_id: int) -> None:
+        # для проверки перебалансировки
+        self.shards[shard_id].process.kill()
+
+    def summary(self) -> Dict:
+        ready = sum(1 for h in self.health.values() if h["ready"])
+        return {
+            "shards": {s.id: {"pid": s.pid, "accounts": len(s.creds), "done": s.done, "error": s.error}
+                       for s in self.shards.values()},
+            "accounts": len(self.creds),
+            "ready": ready,
+            "deaths": self.stats.deaths,
+            "rebalanced": self.stats.rebalanced,
+            "reports": self.stats.reports,
+            "samples": self.stats.samples,
+            "elapsed": time.monotonic() - self.stats.started_at,
+        }
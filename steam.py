@@ -1,27 +1,21 @@
-import aiohttp, rsa, base64, json, struct, hmac, hashlib, time
+import aiohttp, asyncio, rsa, base64, json, time
 from pathlib import Path
 from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import guard
+import ratelimit
+from connectors import make_connector, prewarm
+from cookies import IndexedCookieJar
+from metrics import Metrics, DEFAULT as METRICS
+from proxies import ProxyManager
 
-_CHARS = "23456789BCDFGHJKMNPQRTVWXY"
 _STEAM_BASES = (
     "https://store.steampowered.com",
     "https://steamcommunity.com",
 )
 
 
-def _totp(shared_secret: str, ts: int) -> str:
-    key = base64.b64decode(shared_secret)
-    msg = struct.pack(">Q", ts // 30)
-    dig = hmac.new(key, msg, hashlib.sha1).digest()
-    off = dig[-1] & 0x0F
-    code_int = struct.unpack(">I", dig[off : off + 4])[0] & 0x7FFFFFFF
-    out = []
-    for _ in range(5):
-        code_int, idx = divmod(code_int, len(_CHARS))
-        out.append(_CHARS[idx])
-    return "".join(out)
-
-
 class SteamClient:
     def __init__(
         self,
@@ -30,31 +24,57 @@ class SteamClient:
         mafile: str | Path,
         *,
         proxy: str | None = None,       # "http://user:pass@ip:port"  или  "socks5://..."
+        connector: aiohttp.BaseConnector | None = None,  # общий коннектор (connectors.shared_connector)
+        limiter: ratelimit.RateLimiter | None = None,    # по умолчанию общий ratelimit.DEFAULT
+        metrics: Metrics | None = None,                  # по умолчанию metrics.DEFAULT
+        proxies: ProxyManager | None = None,             # здоровье прокси и failover
         debug: bool = False,
     ):
         self.username, self.password = username, password
+        self.session_started = 0.0      # unix-время входа; 0 — сессии ещё нет
         self.guard = json.loads(Path(mafile).read_text("utf-8"))
+        self.totp = guard.SteamGuard.for_secret(self.guard["shared_secret"])
         self.debug = debug
+        self.proxies = proxies
+        if proxies:
+            if proxy is None:
+                proxy = proxies.best()
+            elif proxy not in proxies.health:
+                proxies.add(proxy)
+        self.limiter = limiter or ratelimit.DEFAULT
+        self.metrics = (metrics or METRICS).bind(
+            account=username, proxy=urlparse(proxy).netloc.rsplit("@", 1)[-1] if proxy else "",
+        )
 
         # ── connector / proxy ───────────────────────
-        connector = None
+        owner = connector is None
+        if owner:
+            connector = make_connector(proxy)
+        self._set_proxy(proxy)
+
+        # ── сессия ──────────────────────────────────
+        self._trace = [self.limiter.trace_config(username, lambda: self.proxy_url), self.metrics.trace_config()]
+        if proxies:
+            self._trace.append(proxies.trace_config(lambda: self.proxy_url))
+        self.sess = self._session(connector, owner, IndexedCookieJar())
+
+    def _set_proxy(self, proxy: str | None) -> None:
+        self.proxy_url = proxy
         self.proxy = self.proxy_auth = None
         if proxy:
-            if proxy.startswith("socks"):
-                from aiohttp_socks import ProxyConnector
-
-                connector = ProxyConnector.from_url(proxy)
-            else:  # http/https
+            if not proxy.startswith("socks"):  # http/https, socks живёт в коннекторе
                 self.proxy = proxy
                 if "@" in proxy:                         # авторизация в url
                     cred, _ = proxy.split("@", 1)
                     user, pwd = cred.split("//")[1].split(":")
                     self.proxy_auth = aiohttp.BasicAuth(user, pwd)
 
-        # ── сессия ──────────────────────────────────
-        self.sess = aiohttp.ClientSession(
+    def _session(self, connector, owner: bool, jar) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(
             connector=connector,
-            cookie_jar=aiohttp.CookieJar(),
+            connector_owner=owner,
+            cookie_jar=jar,
+            trace_configs=self._trace,
             headers={
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                 "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -64,6 +84,17 @@ class SteamClient:
             },
         )
 
+    async def switch_proxy(self, proxy: str) -> None:
+        # cookies остаются в том же jar; http-прокси меняется на лету,
+        # socks сидит в коннекторе — пересоздаём сессию
+        if (self.proxy_url or "").startswith("socks") or proxy.startswith("socks"):
+            old = self.sess
+            self.sess = self._session(make_connector(proxy), True, old.cookie_jar)
+            await old.close()
+        self._set_proxy(proxy)
+        if self.debug:
+            print(f"[Steam] Переключились на прокси {urlparse(proxy).netloc.rsplit('@', 1)[-1]}")
+
     # ── helpers ─────────────────────────────────────
     async def _json_post(self, url: str, **kw) -> Dict:
         async with self.sess.post(url, proxy=self.proxy, proxy_auth=self.proxy_auth, **kw) as r:
@@ -76,16 +107,34 @@ class SteamClient:
             return {}
 
     # ── public ──────────────────────────────────────
+    async def prewarm(self) -> None:
+        await prewarm(self.sess, self.proxy, self.proxy_auth)
+
+    async def _warmup(self) -> None:
+        with self.metrics.span("steam.warmup"):
+            async with self.sess.get(
+                "https://steamcommunity.com/login/",
+                proxy=self.proxy,
+                proxy_auth=self.proxy_auth,
+            ) as r:
+                await r.release()
+
     async def login(self) -> Dict[str, str]:
-        # warm‑up
-        await self.sess.get(
-            "https://steamcommunity.com/login/",
-            proxy=self.proxy,
-            proxy_auth=self.proxy_auth,
+        with self.metrics.span("steam.login"):
+            cookies = await self._login()
+        self.session_started = time.time()
+        return cookies
+
+    async def _login(self) -> Dict[str, str]:
+        # warm‑up и синхронизация часов со Steam (кэшируется на весь процесс)
+        await asyncio.gather(
+            self._warmup(),
+            guard.sync_time(self.sess, self.proxy, self.proxy_auth),
         )
 
         for base in _STEAM_BASES:
-            rsa_info = await self._json_post(f"{base}/login/getrsakey/", data={"username": self.username})
+            with self.metrics.span("steam.getrsakey"):
+                rsa_info = await self._json_post(f"{base}/login/getrsakey/", data={"username": self.username})
             if not rsa_info.get("success"):
                 continue
 
@@ -96,21 +145,11 @@ class SteamClient:
                 rsa.encrypt(self.password.encode(), rsa.PublicKey(mod, exp))
             ).decode()
 
-            res = await self._json_post(
-                f"{base}/login/dologin/",
-                data={
-                    "username": self.username,
-                    "password": enc_pwd,
-                    "twofactorcode": "",
-                    "rsatimestamp": ts,
-                    "remember_login": "false",
-                },
-            )
-
-            if res.get("requires_twofactor"):
-                now = int(time.time())
-                for d in (0, -30, 30):
-                    code = _totp(self.guard["shared_secret"], now + d)
+            # код отправляем сразу; с синхронизированными часами он верный с первой попытки,
+            # иначе перебираем соседние окна
+            codes = [self.totp.code()] if guard.is_synced() else self.totp.window()
+            for attempt, code in enumerate(codes):
+                with self.metrics.span("steam.dologin", attempt=str(attempt)):
                     res = await self._json_post(
                         f"{base}/login/dologin/",
                         data={
@@ -121,15 +160,15 @@ class SteamClient:
                             "remember_login": "false",
                         },
                     )
-                    if res.get("success"):
-                        break
+                if res.get("success") or not res.get("requires_twofactor"):
+                    break
 
             if res.get("success"):
-                return {
-                    c.key: c.value
-                    for c in self.sess.cookie_jar
-                    if c.key in {"steamLoginSecure", "sessionid"}
-                }
+                # вход ставит cookies и магазину, и сообществу; сообщество (последнее) важнее
+                jar: Dict[str, str] = {}
+                for base in _STEAM_BASES:
+                    jar.update(self.sess.cookie_jar.for_host(urlparse(base).hostname))
+                return {k: v for k, v in jar.items() if k in {"steamLoginSecure", "sessionid"}}
 
         raise RuntimeError("Steam login failed")
 
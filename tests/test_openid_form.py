@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from openid_form import extract_form, steam_id
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _page(name: str) -> str:
+    return (FIXTURES / name).read_text("utf-8")
+
+
+def test_steam_openid_page():
+    form = extract_form(_page("steam_openid_login.html"))
+    assert form is not None and form.is_openid
+    assert form.url() == "https://steamcommunity.com/openid/login"
+    assert form.fields == {
+        "action": "steam_openid_login",
+        "openid.mode": "checkid_setup",
+        "openidparams": "eyJvcGVuaWQubW9kZSI6ImNoZWNraWRfc2V0dXAifQ==",
+        "nonce": "a1b2c3d4e5f60718",
+        "openid.return_to": "https://buff.163.com/account/login/steam/verification?back_url=%2F&from=steam",
+    }
+
+
+def test_steam_id():
+    assert steam_id(_page("steam_openid_login.html")) == "76561198000000042"
+
+
+def test_relative_action_and_unclosed_form():
+    form = extract_form('<form action="/openid/login"><input name="openid.mode" value="id_res">')
+    assert form.is_openid
+    assert form.url() == "https://steamcommunity.com/openid/login"
+
+
+def test_falls_back_to_first_form_with_fields():
+    html = '<form action="/a"></form><form action="/b"><input name="x" value="1"></form>'
+    form = extract_form(html)
+    assert form.action == "/b" and form.fields == {"x": "1"}
+    assert extract_form("<html>no forms</html>") is None
+
+
+def test_uppercase_tags():
+    html = '<FORM ACTION="/openid/login"><INPUT TYPE="hidden" VALUE="checkid_setup" NAME="openid.mode"></FORM>'
+    form = extract_form(html)
+    assert form.is_openid and form.action == "/openid/login"
@@ -0,0 +1,128 @@
+import asyncio, sqlite3, time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from crawler import MarketCrawler
+
+# состояние товара: sell_min_price и buy_max_price в фэнях (1/100 юаня), sell_num, buy_num
+State = Tuple[int, int, int, int]
+
+
+def _fen(v) -> int:
+    try:
+        return round(float(v) * 100)
+    except (TypeError, ValueError):
+        return 0
+
+
+def item_state(item: Dict) -> State:
+    return (
+        _fen(item.get("sell_min_price")),
+        _fen(item.get("buy_max_price")),
+        int(item.get("sell_num") or 0),
+        int(item.get("buy_num") or 0),
+    )
+
+
+@dataclass
+class PriceEvent:
+    kind: str                       # "initial" | "new" | "change" | "removed"
+    goods_id: int
+    old: Optional[State]
+    new: Optional[State]
+    name: str = ""
+
+
+class SnapshotWriter:
+    def __init__(self, path: str | Path, *, batch_size: int = 500):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._rows: List[tuple] = []
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS goods_snapshots ("
+            " goods_id INTEGER, ts REAL, kind TEXT,"
+            " sell_min_price INTEGER, buy_max_price INTEGER, sell_num INTEGER, buy_num INTEGER)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_snap_goods ON goods_snapshots (goods_id, ts)")
+        self._db.commit()
+
+    def _write(self, rows: List[tuple]) -> None:
+        self._db.executemany("INSERT INTO goods_snapshots VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self._db.commit()
+
+    async def add(self, ev: PriceEvent, ts: float) -> None:
+        st = ev.new or (None, None, None, None)
+        self._rows.append((ev.goods_id, ts, ev.kind, *st))
+        if len(self._rows) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self._rows:
+            rows, self._rows = self._rows, []
+            await asyncio.to_thread(self._write, rows)
+
+    async def close(self) -> None:
+        await self.flush()
+        self._db.close()
+
+
+class PriceTracker:
+    def __init__(
+        self,
+        client,
+        *,
+        interval: float = 60.0,
+        db: str | Path | None = None,
+        batch_size: int = 500,
+        debug: bool = False,
+        **crawler_kw,
+    ):
+        self.client = client
+        self.interval = interval
+        self.writer = SnapshotWriter(db, batch_size=batch_size) if db else None
+        self.debug = debug
+        self.crawler_kw = crawler_kw
+        self.index: Dict[int, State] = {}
+        self.cycles = 0
+
+    async def _cycle(self) -> AsyncIterator[PriceEvent]:
+        crawler = MarketCrawler(self.client, debug=self.debug, **self.crawler_kw)
+        seen = set()
+        async for item in crawler.crawl():
+            gid = int(item["id"])
+            seen.add(gid)
+            new = item_state(item)
+            old = self.index.get(gid)
+            if old == new:
+                continue
+            self.index[gid] = new
+            kind = "initial" if not self.cycles else "new" if old is None else "change"
+            yield PriceEvent(kind, gid, old, new, item.get("name", ""))
+
+        # пропавшие считаем только по полному проходу без пропущенных страниц
+        if self.cycles and not crawler.failed:
+            for gid in [g for g in self.index if g not in seen]:
+                yield PriceEvent("removed", gid, self.index.pop(gid), None)
+        self.cycles += 1
+
+    async def events(self) -> AsyncIterator[PriceEvent]:
+        try:
+            while True:
+                started = time.monotonic()
+                async for ev in self._cycle():
+                    if self.writer:
+                        await self.writer.add(ev, time.time())
+                    # первый проход только наполняет индекс и базовый снимок
+                    if ev.kind != "initial":
+                        yield ev
+                if self.writer:
+                    await self.writer.flush()
+                if self.debug:
+                    print(f"[TRACK] цикл {self.cycles}: {len(self.index)} товаров, "
+                          f"{time.monotonic() - started:.1f}s")
+                await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        finally:
+            if self.writer:
+                await self.writer.close()